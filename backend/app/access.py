@@ -0,0 +1,115 @@
+import os
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import TTLCache
+from models import Task as DBTask, EmployeeProject, EmployeeTask
+from schemas import AuthenticatedUser
+
+ACCESS_CACHE_SIZE = int(os.getenv("ACCESS_CACHE_SIZE", "10000"))
+ACCESS_CACHE_TTL = float(os.getenv("ACCESS_CACHE_TTL", "60"))
+TASK_PROJECT_CACHE_SIZE = int(os.getenv("TASK_PROJECT_CACHE_SIZE", "100000"))
+
+
+# The projects an employee is assigned to and the tasks assigned to them
+class Access:
+    def __init__(self, project_ids: Iterable[int] = (), task_ids: Iterable[int] = ()):
+        self.project_ids = set(project_ids)
+        self.task_ids = set(task_ids)
+
+
+async def load_access(db: AsyncSession, employee_id: int) -> Access:
+    access = Access()
+    for kind, key in (await db.execute(union_all(
+        select(literal("project"), EmployeeProject.project_id).where(EmployeeProject.employee_id == employee_id),
+        select(literal("task"), EmployeeTask.task_id).where(EmployeeTask.employee_id == employee_id),
+    ))).all():
+        (access.project_ids if kind == "project" else access.task_ids).add(key)
+    return access
+
+
+# employee_id -> Access, loaded on first use and then kept current by the endpoints that write
+# employee_project / employee_task (after they commit). Other workers catch up within ACCESS_CACHE_TTL.
+class AccessCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generation = 0
+
+    async def get(self, db: AsyncSession, employee_id: int) -> Access:
+        access = self.entries.get(employee_id)
+        if access is None:
+            generation = self.generation
+            access = await load_access(db, employee_id)
+            # An assignment changed while loading; use the result once but do not keep it
+            if generation == self.generation:
+                self.entries.set(employee_id, access)
+        return access
+
+    def update(self, employee_ids: Iterable[int], grant: bool, project_id: Optional[int] = None, task_id: Optional[int] = None):
+        self.generation += 1
+        for employee_id in employee_ids:
+            access = self.entries.peek(employee_id)
+            if access is None:
+                continue
+            for ids, key in ((access.project_ids, project_id), (access.task_ids, task_id)):
+                if key is None:
+                    continue
+                if grant:
+                    ids.add(key)
+                else:
+                    ids.discard(key)
+
+    def grant(self, employee_ids: Iterable[int], project_id: Optional[int] = None, task_id: Optional[int] = None):
+        self.update(employee_ids, True, project_id, task_id)
+
+    def revoke(self, employee_ids: Iterable[int], project_id: Optional[int] = None, task_id: Optional[int] = None):
+        self.update(employee_ids, False, project_id, task_id)
+
+    def forget(self, *employee_ids: int):
+        self.generation += 1
+        for employee_id in employee_ids:
+            self.entries.delete(employee_id)
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+access_cache = AccessCache(ACCESS_CACHE_SIZE, ACCESS_CACHE_TTL)
+# task_id -> project_id. Tasks never move between projects, but they are deleted with their project,
+# so entries expire like the access sets and other workers forget deleted tasks within ACCESS_CACHE_TTL.
+task_projects = TTLCache(maxsize=TASK_PROJECT_CACHE_SIZE, ttl=ACCESS_CACHE_TTL)
+
+
+async def project_of_task(db: AsyncSession, task_id: int) -> Optional[int]:
+    project_id = task_projects.get(task_id)
+    if project_id is None:
+        project_id = await db.scalar(select(DBTask.project_id).where(DBTask.task_id == task_id))
+        if project_id is not None:
+            task_projects.set(task_id, project_id)
+    return project_id
+
+
+# Admins see every project, everyone else the projects they are assigned to
+async def require_project_access(db: AsyncSession, user: AuthenticatedUser, project_id: int):
+    if user.role == "admin":
+        return
+    if project_id not in (await access_cache.get(db, user.employee_id)).project_ids:
+        raise HTTPException(status_code=403, detail="Access forbidden: Not assigned to this project")
+
+
+# Admins see every task, managers the tasks of their projects, members the tasks assigned to them
+async def require_task_access(db: AsyncSession, user: AuthenticatedUser, task_id: int):
+    if user.role == "admin":
+        return
+    access = await access_cache.get(db, user.employee_id)
+    if user.role == "member":
+        if task_id not in access.task_ids:
+            raise HTTPException(status_code=403, detail="Access forbidden: Task not assigned to you")
+        return
+
+    project_id = await project_of_task(db, task_id)
+    if project_id is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if project_id not in access.project_ids:
+        raise HTTPException(status_code=403, detail="Access forbidden: Not assigned to this project")
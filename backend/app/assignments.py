@@ -0,0 +1,53 @@
+from fastapi import HTTPException
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Set, Tuple
+from models import Employee as DBEmployee
+from changes import stamp, delete_tracked
+
+
+# employee_id -> role for the given ids, in a single IN query
+async def get_employee_roles(db: AsyncSession, employee_ids: Iterable[int]) -> Dict[int, str]:
+    employee_ids = set(employee_ids)
+    if not employee_ids:
+        return {}
+
+    return dict((await db.execute(
+        select(DBEmployee.employee_id, DBEmployee.role).where(DBEmployee.employee_id.in_(employee_ids))
+    )).all())
+
+
+# Check every requested manager/member id against the employee table in a single IN query
+async def check_employee_roles(db: AsyncSession, manager_ids: Iterable[int] = (), member_ids: Iterable[int] = ()):
+    manager_ids, member_ids = list(manager_ids or []), list(member_ids or [])
+    roles = await get_employee_roles(db, [*manager_ids, *member_ids])
+
+    for manager_id in manager_ids:
+        if roles.get(manager_id) != "manager":
+            raise HTTPException(status_code=404, detail=f"Manager with ID {manager_id} not found")
+
+    for employee_id in member_ids:
+        if roles.get(employee_id) != "member":
+            raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
+
+
+# Bulk insert link rows (EmployeeProject / EmployeeTask) for a freshly created parent
+async def add_links(db: AsyncSession, model, parent_column, parent_id: int, employee_ids: Iterable[int]) -> List[int]:
+    added = list(dict.fromkeys(employee_ids))
+    if added:
+        changed = await stamp(db)
+        await db.execute(insert(model), [{parent_column.key: parent_id, "employee_id": employee_id, **changed} for employee_id in added])
+    return added
+
+
+# Diff the existing link rows against the requested ids and only touch what changed
+async def replace_links(db: AsyncSession, model, parent_column, parent_id: int, employee_ids: Iterable[int]) -> Tuple[List[int], Set[int]]:
+    employee_ids = list(dict.fromkeys(employee_ids))
+    existing = set((await db.scalars(select(model.employee_id).where(parent_column == parent_id))).all())
+
+    removed = existing - set(employee_ids)
+    if removed:
+        await delete_tracked(db, model, parent_column == parent_id, model.employee_id.in_(removed))
+
+    added = await add_links(db, model, parent_column, parent_id, [e for e in employee_ids if e not in existing])
+    return added, removed
@@ -1,20 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import RedirectResponse
-import requests 
+from fastapi.responses import RedirectResponse, JSONResponse, Response
+import hashlib
 import os
+import secrets
+from typing import Optional, Tuple
 from jose import jwt, JWTError
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from database import SessionLocal
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
 from datetime import datetime, timedelta, timezone
-from models import Employee as DBEmployee
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from models import Employee as DBEmployee, AuthSession
+from schemas import AuthenticatedUser
+from cache import TTLCache
+from response_cache import response_cache, EMPLOYEES_TAG
+from oauth import google_endpoints, exchange_code, fetch_user_info
+from urllib.parse import urlencode
 
 load_dotenv()
 
@@ -25,44 +26,192 @@ FRONTEND_URL = os.getenv("FRONTEND_URL")
 SECRET_KEY = os.getenv("JWT_SECRET")  
 ALGORITHM = "HS256"
 
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# The access cookie is a short-lived JWT; the refresh cookie renews it through POST /refresh without
+# going back to Google, and is rotated on every use. Revoking a session stops its refreshes, so access
+# ends within ACCESS_TOKEN_TTL.
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", "900"))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", str(30 * 24 * 3600)))
+# A rotated refresh token presented again within this many seconds is two tabs refreshing at once, not a replay
+REFRESH_REUSE_GRACE = float(os.getenv("REFRESH_REUSE_GRACE", "10"))
+ACCESS_COOKIE = "access_token"
+REFRESH_COOKIE = "refresh_token"
+
+# Decoded token -> employee_id, kept until the token itself expires
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=ACCESS_TOKEN_TTL)
+# employee_id -> AuthenticatedUser snapshot, dropped on role change or after AUTH_CACHE_TTL
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+def invalidate_user(employee_id: int):
+    user_cache.delete(employee_id)
+
+# Session timestamps are naive UTC, like the DateTime columns they are stored in and compared against
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def issue_access_token(employee_id: int) -> str:
+    jwt_payload = {
+        "employee_id": employee_id,
+        "exp": (datetime.now(timezone.utc) + timedelta(seconds=ACCESS_TOKEN_TTL)).timestamp(),
+    }
+    return jwt.encode(jwt_payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def set_session_cookies(response: Response, employee_id: int, refresh_token: str):
+    response.set_cookie(
+        key=ACCESS_COOKIE,
+        value=issue_access_token(employee_id),
+        httponly=True,
+        max_age=ACCESS_TOKEN_TTL,
+        #Enable in Prod
+        # secure=True,
+        # samesite="Strict"
+    )
+    response.set_cookie(
+        key=REFRESH_COOKIE,
+        value=refresh_token,
+        httponly=True,
+        max_age=REFRESH_TOKEN_TTL,
+        #Enable in Prod
+        # secure=True,
+        # samesite="Strict"
+    )
+
+
+def clear_session_cookies(response: Response):
+    response.delete_cookie(ACCESS_COOKIE, httponly=True)
+    response.delete_cookie(REFRESH_COOKIE, httponly=True)
+
+
+# Refresh tokens are "<session_id>.<secret>"
+def parse_refresh_token(token: Optional[str]) -> Tuple[int, str]:
+    session_id, _, secret = (token or "").partition(".")
+    if not session_id.isdigit() or not secret:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return int(session_id), secret
+
+
+# New session at login; the employee's expired and revoked sessions are cleared out at the same time
+async def start_session(db: AsyncSession, employee_id: int) -> str:
+    now = utcnow()
+    await db.execute(delete(AuthSession).where(
+        AuthSession.employee_id == employee_id,
+        or_(AuthSession.expires_at <= now, AuthSession.revoked_at.is_not(None))
+    ))
+
+    secret = secrets.token_urlsafe(32)
+    session = AuthSession(
+        employee_id=employee_id,
+        refresh_hash=hash_secret(secret),
+        created_at=now,
+        rotated_at=now,
+        expires_at=now + timedelta(seconds=REFRESH_TOKEN_TTL),
+    )
+    db.add(session)
+    await db.commit()
+    return f"{session.session_id}.{secret}"
+
+
+# Swap a refresh token for the next one. Only the current token matches the conditional UPDATE, so two
+# requests with the same token cannot both rotate it. Returns (employee_id, new refresh token).
+async def rotate_session(db: AsyncSession, token: Optional[str]) -> Tuple[int, str]:
+    session_id, secret = parse_refresh_token(token)
+    presented = hash_secret(secret)
+    now = utcnow()
+
+    employee_id = await db.scalar(select(AuthSession.employee_id).where(AuthSession.session_id == session_id))
+    if employee_id is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    new_secret = secrets.token_urlsafe(32)
+    rotated = await db.execute(
+        update(AuthSession).where(
+            AuthSession.session_id == session_id,
+            AuthSession.refresh_hash == presented,
+            AuthSession.revoked_at.is_(None),
+            AuthSession.expires_at > now,
+        ).values(
+            refresh_hash=hash_secret(new_secret),
+            previous_hash=presented,
+            rotated_at=now,
+            expires_at=now + timedelta(seconds=REFRESH_TOKEN_TTL),
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    if rotated.rowcount == 1:
+        await db.commit()
+        return employee_id, f"{session_id}.{new_secret}"
+
+    # The token before the current one: a concurrent refresh just rotated it, or it was stolen and replayed
+    replayed = await db.scalar(select(AuthSession.rotated_at <= now - timedelta(seconds=REFRESH_REUSE_GRACE)).where(
+        AuthSession.session_id == session_id,
+        AuthSession.previous_hash == presented,
+        AuthSession.revoked_at.is_(None),
+    ))
+    if replayed:
+        await db.execute(
+            update(AuthSession).where(AuthSession.session_id == session_id).values(revoked_at=now),
+            execution_options={"synchronize_session": False}
+        )
+        await db.commit()
+        raise HTTPException(status_code=401, detail="Refresh token reused, session revoked")
+    # Another tab refreshed first and the browser now holds its cookies: retryable, not a logout
+    if replayed is not None:
+        raise HTTPException(status_code=409, detail="Refresh token already rotated, retry with the current cookies")
+    raise HTTPException(status_code=401, detail="Session expired or revoked")
+
+
+# Revoking only needs the session row; the secret has to match so a session id alone revokes nothing
+async def revoke_session(db: AsyncSession, token: Optional[str]):
+    try:
+        session_id, secret = parse_refresh_token(token)
+    except HTTPException:
+        return
+
+    await db.execute(
+        update(AuthSession).where(AuthSession.session_id == session_id, AuthSession.refresh_hash == hash_secret(secret))
+        .values(revoked_at=utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    await db.commit()
+
+
+async def revoke_sessions(db: AsyncSession, employee_id: int) -> int:
+    revoked = await db.execute(
+        update(AuthSession).where(AuthSession.employee_id == employee_id, AuthSession.revoked_at.is_(None))
+        .values(revoked_at=utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    await db.commit()
+    return revoked.rowcount
+
+
 auth_router = APIRouter()
 
 @auth_router.get("/login")
 async def login():
-    google_auth_url = (
-        f"https://accounts.google.com/o/oauth2/v2/auth"
-        f"?client_id={GOOGLE_CLIENT_ID}"
-        f"&redirect_uri={REDIRECT_URI}"
-        f"&response_type=code"
-        f"&scope=openid profile email"
-    )
-    return RedirectResponse(url=google_auth_url)
-
-@auth_router.get("/callback")
-async def callback(code: str, db: Session = Depends(get_db)):
-    token_url = "https://oauth2.googleapis.com/token"
-    data = {
-        "code": code,
+    endpoints = await google_endpoints()
+    google_auth_url = endpoints["authorization_endpoint"] + "?" + urlencode({
         "client_id": GOOGLE_CLIENT_ID,
-        "client_secret": GOOGLE_CLIENT_SECRET,
         "redirect_uri": REDIRECT_URI,
-        "grant_type": "authorization_code",
-    }
-
-    token_response = requests.post(token_url, data=data)
-    if token_response.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to fetch token")
+        "response_type": "code",
+        "scope": "openid profile email",
+    })
+    return RedirectResponse(url=google_auth_url)
 
-    token_info = token_response.json()
+@auth_router.get("/callback")
+async def callback(code: str, db: AsyncSession = Depends(get_db)):
+    token_info = await exchange_code(code, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, REDIRECT_URI)
     access_token = token_info.get("access_token")
 
-    user_info_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    user_info_response = requests.get(user_info_url, headers=headers)
-    if user_info_response.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to fetch user info")
-
-    user_info = user_info_response.json()
+    user_info = await fetch_user_info(access_token)
     email = user_info.get("email")
     name = user_info.get("name")
     profile_image_url = user_info.get("picture")
@@ -71,7 +220,7 @@ async def callback(code: str, db: Session = Depends(get_db)):
     if not email or not name:
         raise HTTPException(status_code=400, detail="Incomplete user info from Google")
 
-    user = db.query(DBEmployee).filter(DBEmployee.email_id == email).first()
+    user = await db.scalar(select(DBEmployee).where(DBEmployee.email_id == email))
 
     if not user:
         new_user = DBEmployee(
@@ -81,43 +230,87 @@ async def callback(code: str, db: Session = Depends(get_db)):
             profile_image_url=profile_image_url
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        await response_cache.invalidate(EMPLOYEES_TAG)
         user = new_user
 
-    jwt_payload = {
-        "employee_id": user.employee_id,
-        "exp": (datetime.now(timezone.utc) + timedelta(days=1)).timestamp(), 
-    }
-    jwt_token = jwt.encode(jwt_payload, SECRET_KEY, algorithm=ALGORITHM)
+    refresh_token = await start_session(db, user.employee_id)
 
     redirect_response = RedirectResponse(url=f"{FRONTEND_URL}/home")
-    redirect_response.set_cookie(
-        key="access_token",
-        value=jwt_token,
-        httponly=True,
-        max_age=3600,
-        #Enable in Prod
-        # secure=True,
-        # samesite="Strict"
-    )
+    set_session_cookies(redirect_response, user.employee_id, refresh_token)
     return redirect_response
 
-def verify_jwt(request: Request, db: Session = Depends(get_db)):
-    token = request.cookies.get("access_token")
+
+# New access and refresh cookies for a valid refresh cookie, without another OAuth round trip
+@auth_router.post("/refresh")
+async def refresh(request: Request, db: AsyncSession = Depends(get_db)):
+    token = request.cookies.get(REFRESH_COOKIE)
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing refresh token")
+
+    employee_id, refresh_token = await rotate_session(db, token)
+    response = JSONResponse({"expires_in": ACCESS_TOKEN_TTL})
+    set_session_cookies(response, employee_id, refresh_token)
+    return response
+
+async def verify_jwt(request: Request, db: AsyncSession = Depends(get_db)):
+    # Sub-requests of /batch run as the user the batch was authenticated as
+    if "batch_user" in request.scope:
+        return request.scope["batch_user"]
+
+    token = request.cookies.get(ACCESS_COOKIE)
     if not token:
         raise HTTPException(status_code=401, detail="Missing access token")
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    employee_id = token_cache.get(token)
+    if employee_id is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
         exp = payload.get("exp")
-        if datetime.now(timezone.utc).timestamp() > exp:
+        employee_id = payload.get("employee_id")
+        remaining = exp - datetime.now(timezone.utc).timestamp() if exp else 0
+        if remaining <= 0:
             raise HTTPException(status_code=401, detail="Token has expired")
+        if employee_id is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        token_cache.set(token, employee_id, ttl=remaining)
 
-        user = db.query(DBEmployee).filter(DBEmployee.employee_id == payload.get("employee_id")).first()
-        if not user:
+    user = user_cache.get(employee_id)
+    if user is None:
+        db_user = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == employee_id))
+        if not db_user:
             raise HTTPException(status_code=401, detail="User not found")
 
-        return user  
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        user = AuthenticatedUser.model_validate(db_user)
+        user_cache.set(employee_id, user)
+
+    return user
+
+
+# Sign an employee out everywhere (ADMIN). Their access cookies stay valid for at most ACCESS_TOKEN_TTL.
+@auth_router.delete("/employees/{employee_id}/sessions")
+async def revoke_employee_sessions(
+    employee_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    return {"revoked": await revoke_sessions(db, employee_id)}
+
+
+@auth_router.get("/metrics/auth-cache")
+async def auth_cache_stats(user: AuthenticatedUser = Depends(verify_jwt)):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+    }
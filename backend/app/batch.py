@@ -0,0 +1,116 @@
+import asyncio
+import os
+from typing import List
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import Match
+from schemas import AuthenticatedUser, BatchRequestItem
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Streams, unauthenticated routes and /batch itself cannot run inside a batch
+BATCH_EXCLUDED_ROUTES = {"/batch", "/events", "/export/{table}", "/metrics", "/login", "/callback"}
+
+
+# One AsyncSession cannot run two statements at once, so sub-requests take turns on it.
+# Everything between their statements (cache lookups, building and serializing the response) still overlaps.
+class SharedSession:
+    SERIALIZED = {"execute", "scalar", "scalars", "get"}
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.lock = asyncio.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.session, name)
+        if name not in self.SERIALIZED:
+            return attribute
+
+        async def serialized(*args, **kwargs):
+            async with self.lock:
+                return await attribute(*args, **kwargs)
+        return serialized
+
+
+def error_body(detail: str) -> bytes:
+    return orjson.dumps({"detail": detail})
+
+
+# Match the sub-request the way Starlette's router does: a full match wins, a partial one means another method
+def find_route(app, scope: dict):
+    best = (Match.NONE, None, {})
+    for route in app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return match, route, child_scope
+        if match == Match.PARTIAL and best[0] == Match.NONE:
+            best = (match, route, child_scope)
+    return best
+
+
+async def receive_nothing():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+# Run one sub-request through its route, as Starlette's router would, and return (status, JSON body)
+async def run_request(scope: dict, item: BatchRequestItem, semaphore: asyncio.Semaphore):
+    if item.method.upper() != "GET":
+        return 405, error_body("Only GET requests can be batched")
+    if not item.path.startswith("/"):
+        return 400, error_body("Path must start with /")
+
+    path, _, query = item.path.partition("?")
+    sub_scope = {
+        key: value for key, value in scope.items() if key not in ("route", "endpoint", "path_params")
+    }
+    sub_scope.update(
+        method="GET",
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=[(name, value) for name, value in scope["headers"] if name not in (b"content-length", b"content-type")],
+        # request.state is per request (response_cache keeps the generation it read there)
+        state={},
+    )
+
+    match, route, child_scope = find_route(scope["app"], sub_scope)
+    if match == Match.NONE:
+        return 404, error_body("Not Found")
+    if match == Match.PARTIAL:
+        return 405, error_body("Method Not Allowed")
+    if route.path in BATCH_EXCLUDED_ROUTES:
+        return 400, error_body(f"{route.path} cannot be batched")
+    sub_scope.update(child_scope)
+
+    status = 500
+    body = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    async with semaphore:
+        try:
+            await route.handle(sub_scope, receive_nothing, send)
+        except Exception as e:
+            print(f"Batched request {item.path} failed: {e}")
+            return 500, error_body("An unexpected error occurred")
+
+    return status, b"".join(body) or b"null"
+
+
+# The sub-responses are already JSON, so they are spliced into the envelope instead of parsed and re-encoded
+async def run_batch(scope: dict, db: AsyncSession, user: AuthenticatedUser, items: List[BatchRequestItem]) -> bytes:
+    scope = {**scope, "batch_db": SharedSession(db), "batch_user": user}
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    results = await asyncio.gather(*(run_request(scope, item, semaphore) for item in items))
+
+    parts = [
+        b'{"id":%s,"status":%d,"body":%s}' % (orjson.dumps(item.id), status, body)
+        for item, (status, body) in zip(items, results)
+    ]
+    return b'{"responses":[' + b",".join(parts) + b"]}"
@@ -0,0 +1,286 @@
+import csv
+from collections import Counter
+import json
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Project as DBProject, Task as DBTask, EmployeeTask
+from schemas import BulkItemResult
+from assignments import get_employee_roles
+from progress import adjust_task_counts, task_added, status_changed
+from changes import stamp
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv"}
+
+# (index, parsed item or None, error or None)
+Item = Tuple[int, Optional[BaseModel], Optional[str]]
+
+
+def validation_detail(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}" for error in e.errors())
+
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    buffer = b""
+    first = True
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8").rstrip("\r")
+            yield text.lstrip("\ufeff") if first else text
+            first = False
+    if buffer:
+        text = buffer.decode("utf-8").rstrip("\r")
+        yield text.lstrip("\ufeff") if first else text
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator:
+    async for line in iter_lines(request):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+# CSV rows as dicts keyed by the header row; employee_ids may be separated by spaces or semicolons
+async def iter_csv(request: Request) -> AsyncIterator[dict]:
+    header = None
+    pending = ""
+    async for line in iter_lines(request):
+        pending = f"{pending}\n{line}" if pending else line
+        # A quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        row = next(csv.reader([pending]), [])
+        pending = ""
+
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if not any(value.strip() for value in row):
+            continue
+
+        item = dict(zip(header, row))
+        if "employee_ids" in item:
+            item["employee_ids"] = [value for value in item["employee_ids"].replace(";", " ").split()]
+        yield item
+
+
+# Parse the request body item by item, without holding an NDJSON or CSV upload in memory
+async def read_items(request: Request, model: Type[BaseModel]) -> AsyncIterator[Item]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        source = iter_ndjson(request)
+    elif content_type in CSV_TYPES:
+        source = iter_csv(request)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}") from e
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of items")
+
+        async def iter_list():
+            for item in items:
+                yield item
+        source = iter_list()
+
+    index = 0
+    async for raw in source:
+        if index >= BULK_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+        if isinstance(raw, ValueError):
+            yield index, None, f"Invalid JSON: {raw}"
+        else:
+            try:
+                yield index, model.model_validate(raw), None
+            except ValidationError as e:
+                yield index, None, validation_detail(e)
+        index += 1
+
+
+# Read the whole upload for a background job, which replays it later: [index, item as JSON or None, error or None]
+async def collect_items(items: AsyncIterator[Item]) -> List[list]:
+    return [[index, item.model_dump(mode="json") if item is not None else None, error] async for index, item, error in items]
+
+
+async def replay_items(items: List[list], model: Type[BaseModel]) -> AsyncIterator[Item]:
+    for index, item, error in items:
+        yield index, model.model_validate(item) if item is not None else None, error
+
+
+async def chunked(items: AsyncIterator[Item], size: int) -> AsyncIterator[List[Item]]:
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Validate each chunk with two IN queries, then insert its tasks and links in bulk.
+# Nothing is committed here; the caller commits once at the end.
+# Returns the results and task_id -> (project_id, assigned employee ids) for every created task.
+# progress, if given, is told how many items have been handled before each chunk and at the end.
+async def import_tasks(
+    db: AsyncSession, items: AsyncIterator[Item], owner_id: int, progress: Optional[Callable[[int], None]] = None
+) -> Tuple[List[BulkItemResult], Dict[int, Tuple[int, List[int]]]]:
+    results = []
+    imported = {}
+    done = 0
+    last_task_id = 0
+
+    async for chunk in chunked(items, BULK_CHUNK_SIZE):
+        if progress:
+            progress(done)
+        done += len(chunk)
+        valid = []
+        for index, task, error in chunk:
+            if error is not None:
+                results.append(BulkItemResult(index=index, status="error", detail=error))
+            else:
+                valid.append((index, task))
+
+        existing_projects = set((await db.scalars(
+            select(DBProject.project_id).where(DBProject.project_id.in_({task.project_id for _, task in valid}))
+        )).all()) if valid else set()
+        roles = await get_employee_roles(db, {employee_id for _, task in valid for employee_id in task.employee_ids})
+
+        created = []
+        for index, task in valid:
+            if task.project_id not in existing_projects:
+                results.append(BulkItemResult(index=index, status="error", detail=f"Project with ID {task.project_id} not found"))
+                continue
+
+            missing = next((employee_id for employee_id in task.employee_ids if roles.get(employee_id) != "member"), None)
+            if missing is not None:
+                results.append(BulkItemResult(index=index, status="error", detail=f"Employee with ID {missing} not found"))
+                continue
+
+            created.append((index, task))
+
+        if not created:
+            continue
+
+        # One multi-row INSERT per chunk. Every row this transaction writes carries its change version,
+        # so the new ids come back in one query, in insert order.
+        changed = await stamp(db)
+        await db.execute(insert(DBTask).values([
+            {
+                "name": task.name,
+                "description": task.description,
+                "due_date": task.due_date,
+                "project_id": task.project_id,
+                "status": "Not Started",
+                "task_owner_id": owner_id,
+                **changed,
+            }
+            for _, task in created
+        ]))
+        task_ids = (await db.scalars(
+            select(DBTask.task_id).where(DBTask.version == changed["version"], DBTask.task_id > last_task_id)
+            .order_by(DBTask.task_id)
+        )).all()
+        last_task_id = task_ids[-1]
+
+        links = [
+            {"task_id": task_id, "employee_id": employee_id, **changed}
+            for (_, task), task_id in zip(created, task_ids)
+            for employee_id in dict.fromkeys(task.employee_ids)
+        ]
+        if links:
+            await db.execute(insert(EmployeeTask), links)
+
+        deltas = Counter()
+        for _, task in created:
+            deltas.update(task_added(task.project_id, "Not Started"))
+        await adjust_task_counts(db, deltas)
+
+        for (index, task), task_id in zip(created, task_ids):
+            results.append(BulkItemResult(index=index, status="created", task_id=task_id))
+            imported[task_id] = (task.project_id, list(dict.fromkeys(task.employee_ids)))
+
+    if progress:
+        progress(done)
+    results.sort(key=lambda result: result.index)
+    return results, imported
+
+
+# Look up each chunk's tasks in one query and issue one UPDATE per distinct status.
+# Returns the results and task_id -> (project_id, new status) for everything that changed; progress as above.
+async def update_task_statuses(
+    db: AsyncSession, items: AsyncIterator[Item], progress: Optional[Callable[[int], None]] = None
+) -> Tuple[List[BulkItemResult], Dict[int, Tuple[int, str]]]:
+    results = []
+    updated = {}
+    done = 0
+
+    async for chunk in chunked(items, BULK_CHUNK_SIZE):
+        if progress:
+            progress(done)
+        done += len(chunk)
+        valid = []
+        for index, change, error in chunk:
+            if error is not None:
+                results.append(BulkItemResult(index=index, status="error", detail=error))
+            else:
+                valid.append((index, change))
+
+        # The rows stay locked until commit, so the count deltas below start from the statuses that get replaced.
+        # Locking in task_id order keeps two overlapping uploads from deadlocking.
+        current = {
+            task_id: (project_id, status)
+            for task_id, project_id, status in (await db.execute(
+                select(DBTask.task_id, DBTask.project_id, DBTask.status)
+                .where(DBTask.task_id.in_({change.task_id for _, change in valid}))
+                .order_by(DBTask.task_id)
+                .with_for_update()
+            )).all()
+        } if valid else {}
+
+        # The last change for a task wins, as if the items had been sent one by one
+        statuses = {}
+        for index, change in valid:
+            if change.task_id not in current:
+                results.append(BulkItemResult(index=index, status="error", task_id=change.task_id, detail="Task not found"))
+                continue
+            statuses[change.task_id] = change.new_status
+            results.append(BulkItemResult(index=index, status="updated", task_id=change.task_id))
+
+        by_status = {}
+        for task_id, status in statuses.items():
+            by_status.setdefault(status, []).append(task_id)
+        changed = await stamp(db) if by_status else {}
+        for status, task_ids in by_status.items():
+            await db.execute(
+                update(DBTask).where(DBTask.task_id.in_(task_ids)).values(status=status, **changed),
+                execution_options={"synchronize_session": False}
+            )
+
+        deltas = Counter()
+        for task_id, status in statuses.items():
+            project_id, old_status = current[task_id]
+            deltas.update(status_changed(project_id, old_status, status))
+        await adjust_task_counts(db, deltas)
+
+        updated.update({task_id: (current[task_id][0], status) for task_id, status in statuses.items()})
+
+    if progress:
+        progress(done)
+    results.sort(key=lambda result: result.index)
+    return results, updated
+
@@ -0,0 +1,172 @@
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, select, insert, delete, update, func, literal, null, Integer, DateTime
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from database import version_async_engine
+from models import Project, Task, Employee, EmployeeProject, EmployeeTask, ChangeCounter, OpenChange, Tombstone
+
+# Seconds a version may stay open before /sync stops waiting for it (its process died mid-transaction).
+# Keep it above the longest writing transaction.
+CHANGE_OPEN_TIMEOUT = float(os.getenv("CHANGE_OPEN_TIMEOUT", "3600"))
+
+# Tracked models and the key columns their tombstones record: (row_id, employee_id)
+TRACKED = {
+    Project: ("project_id", None),
+    Task: ("task_id", None),
+    Employee: ("employee_id", None),
+    EmployeeProject: ("project_id", "employee_id"),
+    EmployeeTask: ("task_id", "employee_id"),
+}
+
+
+# Naive UTC: the DateTime columns are timezone-naive, and asyncpg rejects aware values for them
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def next_version(conn: Connection) -> int:
+    bump = update(ChangeCounter).values(version=ChangeCounter.version + 1)
+    if conn.dialect.update_returning:
+        return conn.execute(bump.returning(ChangeCounter.version)).scalar_one()
+    conn.execute(bump)
+    return conn.execute(select(ChangeCounter.version)).scalar_one()
+
+
+def version_engine(engine: Engine) -> Engine:
+    return version_async_engine.sync_engine if engine.dialect.is_async else engine
+
+
+# On MySQL and PostgreSQL the version is taken in a short transaction of its own, so the counter row is locked
+# for that transaction only, and recorded as open. The writer deletes its open row itself: the row disappears
+# in the same commit as the writer's changes, and /sync reads no further than the oldest open version.
+def open_version(conn: Connection) -> int:
+    with version_engine(conn.engine).begin() as version_conn:
+        version = next_version(version_conn)
+        version_conn.execute(insert(OpenChange).values(version=version, opened_at=utcnow()))
+    conn.execute(delete(OpenChange).where(OpenChange.version == version))
+    return version
+
+
+# Every writing transaction takes the next version once and stamps all the rows it touches with it
+def change_version(conn: Connection, session: Session) -> int:
+    transaction = conn.get_transaction()
+    cached = conn.info.get("change_version")
+    if cached is not None and cached[0] is transaction:
+        return cached[1]
+
+    if conn.dialect.name == "sqlite":
+        # SQLite runs one writing transaction at a time, so versions taken inside it already commit in order
+        version = next_version(conn)
+    else:
+        version = open_version(conn)
+        session.info["open_version"] = version
+
+    conn.info["change_version"] = (transaction, version)
+    return version
+
+
+def change_values(conn: Connection, session: Session) -> dict:
+    return {"version": change_version(conn, session), "updated_at": utcnow()}
+
+
+# Highest version below every open one: each transaction up to it has committed or rolled back. One statement,
+# so the counter and the open versions come from the same snapshot.
+def committed_version():
+    cutoff = utcnow() - timedelta(seconds=CHANGE_OPEN_TIMEOUT)
+    oldest_open = select(func.min(OpenChange.version)).where(OpenChange.opened_at > cutoff).scalar_subquery()
+    return select(func.coalesce(oldest_open - 1, ChangeCounter.version))
+
+
+# Column values for rows written with Core statements (bulk inserts and updates), which skip the mapper events below
+async def stamp(db: AsyncSession) -> dict:
+    return await (await db.connection()).run_sync(change_values, db.sync_session)
+
+
+# Tombstones for every matching row; also used for the rows ON DELETE CASCADE is about to remove
+async def record_tombstones(db: AsyncSession, model, *criteria):
+    changed = await stamp(db)
+    key, employee_key = TRACKED[model]
+    await db.execute(insert(Tombstone).from_select(
+        ["version", "table_name", "row_id", "employee_id", "deleted_at"],
+        select(
+            literal(changed["version"], Integer),
+            literal(model.__tablename__),
+            getattr(model, key),
+            getattr(model, employee_key) if employee_key else null(),
+            literal(changed["updated_at"], DateTime),
+        ).where(*criteria)
+    ))
+
+
+# DELETE with Core, recording a tombstone for every matching row first
+async def delete_tracked(db: AsyncSession, model, *criteria):
+    await record_tombstones(db, model, *criteria)
+    await db.execute(delete(model).where(*criteria))
+
+
+# ORM inserts and updates, including the ones cascaded from a parent
+def stamp_row(mapper, conn: Connection, target):
+    for name, value in change_values(conn, object_session(target)).items():
+        setattr(target, name, value)
+
+
+# before_update also fires for objects that were touched without any net change
+def stamp_changed_row(mapper, conn: Connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        stamp_row(mapper, conn, target)
+
+
+# ORM deletes are collected and written once per flush
+def collect_tombstone(mapper, conn: Connection, target):
+    key, employee_key = TRACKED[type(target)]
+    changed = change_values(conn, object_session(target))
+    object_session(target).info.setdefault("tombstones", []).append({
+        "version": changed["version"],
+        "table_name": target.__tablename__,
+        "row_id": getattr(target, key),
+        "employee_id": getattr(target, employee_key) if employee_key else None,
+        "deleted_at": changed["updated_at"],
+    })
+
+
+def write_tombstones(session: Session, flush_context):
+    tombstones = session.info.pop("tombstones", None)
+    if tombstones:
+        session.connection().execute(insert(Tombstone), tombstones)
+
+
+def discard_tombstones(session: Session):
+    session.info.pop("tombstones", None)
+
+
+# A committed writer already deleted its open version
+def close_version(session: Session):
+    session.info.pop("open_version", None)
+
+
+# A rolled back (or abandoned) writer's delete was undone with it. The open row is deleted here, once the
+# rollback has released it, so /sync does not wait CHANGE_OPEN_TIMEOUT for it.
+def release_version(session: Session, transaction):
+    if transaction.parent is not None:
+        return
+    version = session.info.pop("open_version", None)
+    if version is None:
+        return
+
+    try:
+        with version_engine(session.get_bind()).begin() as version_conn:
+            version_conn.execute(delete(OpenChange).where(OpenChange.version == version))
+    except Exception as e:
+        print(f"Could not release change version {version}: {e}")
+
+
+for model in TRACKED:
+    event.listen(model, "before_insert", stamp_row)
+    event.listen(model, "before_update", stamp_changed_row)
+    event.listen(model, "after_delete", collect_tombstone)
+event.listen(Session, "after_flush", write_tombstones)
+event.listen(Session, "after_rollback", discard_tombstones)
+event.listen(Session, "after_commit", close_version)
+event.listen(Session, "after_transaction_end", release_version)
@@ -1,21 +1,182 @@
-import os 
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from fastapi import Request
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
 
 if not SQLALCHEMY_DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set!")
 
+# Connection pool settings. DB_MAX_CONNECTIONS is the budget shared by all
+# WEB_CONCURRENCY workers and only applies when DB_POOL_SIZE is not set.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+DB_MAX_CONNECTIONS = os.getenv("DB_MAX_CONNECTIONS")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or (max(1, int(DB_MAX_CONNECTIONS) // WEB_CONCURRENCY) if DB_MAX_CONNECTIONS else 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "0" if DB_MAX_CONNECTIONS else "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Connections for handing out change versions (changes.py), kept apart from the request pool
+DB_VERSION_POOL_SIZE = int(os.getenv("DB_VERSION_POOL_SIZE", "2"))
+
+# Async driver used for each sync dialect when ASYNC_DATABASE_URL is not given
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if not driver:
+        raise RuntimeError(f"No async driver known for {parsed.drivername}, set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_DATABASE_READ_URL") or (
+    to_async_url(SQLALCHEMY_READ_DATABASE_URL) if SQLALCHEMY_READ_DATABASE_URL else None
+)
+
+
+# Checkout counters and time spent waiting for a pooled connection
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(0, pool.overflow()))
+        return stats
+
+
+def metered_pool(pool_class, metrics: PoolMetrics):
+    class MeteredPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.record_wait(time.perf_counter() - started)
+
+    return MeteredPool
+
+
+def statement_timeout_args(url: str) -> dict:
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    parsed = make_url(url)
+    backend, driver = parsed.get_backend_name(), parsed.get_driver_name()
+    if backend == "mysql":
+        return {"init_command": f"SET SESSION MAX_EXECUTION_TIME={DB_STATEMENT_TIMEOUT_MS}"}
+    if backend == "postgresql" and driver == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    if backend == "postgresql":
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def engine_options(url: str, pool_class, metrics: PoolMetrics = None) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=metered_pool(pool_class, metrics) if metrics else pool_class,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    connect_args = statement_timeout_args(url)
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+pool_metrics = PoolMetrics()
+read_pool_metrics = PoolMetrics()
+
 try:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL, QueuePool))
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, pool_metrics))
+    read_async_engine = create_async_engine(
+        ASYNC_READ_DATABASE_URL, **engine_options(ASYNC_READ_DATABASE_URL, AsyncAdaptedQueuePool, read_pool_metrics)
+    ) if ASYNC_READ_DATABASE_URL else None
+    # A writer holding a request connection takes its version here, so a full request pool cannot deadlock it.
+    # SQLite takes versions inside the writing transaction and needs none.
+    version_async_engine = create_async_engine(ASYNC_DATABASE_URL, **{
+        **engine_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool), "pool_size": DB_VERSION_POOL_SIZE
+    }) if make_url(ASYNC_DATABASE_URL).get_backend_name() != "sqlite" else None
 except Exception as e:
     raise RuntimeError(f"Failed to connect to the database: {e}")
 
+
+# SQLite only enforces foreign keys, and with them ON DELETE CASCADE, when each connection turns them on
+def enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for sqlite_engine in (engine, async_engine.sync_engine, read_async_engine and read_async_engine.sync_engine):
+    if sqlite_engine is not None and sqlite_engine.dialect.name == "sqlite":
+        event.listen(sqlite_engine, "connect", enable_foreign_keys)
+
+
+# Sync sessions are kept for scripts and tooling; request handlers use AsyncSessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+# Read-only GET endpoints go to the replica when DATABASE_READ_URL is set
+ReadSessionLocal = async_sessionmaker(bind=read_async_engine or async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    # Sub-requests of /batch share the batch's session
+    if "batch_db" in request.scope:
+        yield request.scope["batch_db"]
+        return
+
+    async with ReadSessionLocal() as db:
+        yield db
+
+
+def pool_stats() -> dict:
+    stats = {"primary": pool_metrics.snapshot(async_engine.sync_engine.pool)}
+    if read_async_engine is not None:
+        stats["replica"] = read_pool_metrics.snapshot(read_async_engine.sync_engine.pool)
+    return stats
@@ -0,0 +1,253 @@
+import asyncio
+import os
+from typing import Callable, List, Optional
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ReadSessionLocal
+from models import EmployeeTask
+from access import access_cache
+from schemas import AuthenticatedUser
+
+# memory:// delivers events to the subscribers of this worker only, redis://host:port/db fans them out to every worker
+EVENTS_URL = os.getenv("EVENTS_URL", "memory://")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "task-tracker:events")
+# Events a slow client may fall behind by before its stream is closed with an "overflow" event
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+
+def change_event(type: str, **fields) -> dict:
+    return {"type": type, **fields}
+
+
+# employee_ids is the full assignment after the change, so subscribers can follow it
+def project_event(type: str, project, employee_ids: List[int]) -> dict:
+    return change_event(
+        type,
+        project_id=project.project_id,
+        name=project.name,
+        description=project.description,
+        start_date=project.start_date,
+        end_date=project.end_date,
+        status=project.project_status,
+        employee_ids=employee_ids,
+    )
+
+
+def task_event(type: str, task, employee_ids: List[int]) -> dict:
+    return change_event(
+        type,
+        task_id=task.task_id,
+        project_id=task.project_id,
+        name=task.name,
+        description=task.description,
+        due_date=task.due_date,
+        status=task.status,
+        employee_ids=employee_ids,
+    )
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, dispatch: Callable[[List[dict]], None]):
+        self.dispatch = dispatch
+
+    async def start(self):
+        pass
+
+    async def publish(self, events: List[dict]):
+        self.dispatch(events)
+
+    async def close(self):
+        pass
+
+
+# Every worker publishes to one channel and dispatches what it receives to its own subscribers
+class RedisBackend:
+    name = "redis"
+
+    def __init__(self, url: str, dispatch: Callable[[List[dict]], None]):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, protocol=2)
+        self.dispatch = dispatch
+        self.listener = None
+
+    async def start(self):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(orjson.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Event subscription failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def publish(self, events: List[dict]):
+        await self.client.publish(EVENTS_CHANNEL, orjson.dumps(events))
+
+    async def close(self):
+        if self.listener is not None:
+            self.listener.cancel()
+        await self.client.aclose()
+
+
+def create_backend(url: str, dispatch: Callable[[List[dict]], None]):
+    if url.startswith("memory://"):
+        return MemoryBackend(dispatch)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, dispatch)
+    raise RuntimeError(f"Unsupported EVENTS_URL: {url}")
+
+
+# One open /events stream. Project and task ids start from employee_project/employee_task
+# and follow the membership changes carried by later events.
+class Subscription:
+    def __init__(self, user: AuthenticatedUser, project_ids, task_ids):
+        self.employee_id = user.employee_id
+        self.role = user.role
+        self.project_ids = set(project_ids)
+        self.task_ids = set(task_ids)
+        self.queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+        self.sequence = 0
+
+    # The part of an event this subscriber may see, or None
+    def scope(self, event: dict) -> Optional[dict]:
+        kind = event["type"]
+        if kind == "employee.role_changed":
+            return event if self.role == "admin" or event["employee_id"] == self.employee_id else None
+        if self.role == "admin":
+            return event
+
+        project_id = event.get("project_id")
+        employee_ids = event.get("employee_ids")
+        if kind.startswith("project."):
+            # Employees removed from a project still hear about it once
+            was_member = project_id in self.project_ids
+            if employee_ids is not None:
+                if self.employee_id in employee_ids:
+                    self.project_ids.add(project_id)
+                else:
+                    self.project_ids.discard(project_id)
+            if kind == "project.deleted":
+                self.project_ids.discard(project_id)
+            return event if was_member or project_id in self.project_ids else None
+
+        if project_id not in self.project_ids:
+            return None
+        if self.role != "member" or kind == "tasks.imported":
+            return event
+
+        # Members only see the tasks assigned to them
+        if kind == "tasks.status_changed":
+            changes = [change for change in event["changes"] if change["task_id"] in self.task_ids]
+            return {**event, "changes": changes} if changes else None
+
+        task_id = event["task_id"]
+        was_assigned = task_id in self.task_ids
+        if employee_ids is not None:
+            if self.employee_id in employee_ids:
+                self.task_ids.add(task_id)
+            else:
+                self.task_ids.discard(task_id)
+        if kind == "task.deleted":
+            self.task_ids.discard(task_id)
+        return event if was_assigned or task_id in self.task_ids else None
+
+    def deliver(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    # Bulk imports do not list assignees, so members re-read their tasks afterwards
+    async def reload_tasks(self):
+        async with ReadSessionLocal() as db:
+            self.task_ids = set((await db.scalars(
+                select(EmployeeTask.task_id).where(EmployeeTask.employee_id == self.employee_id)
+            )).all())
+
+    def encode(self, event: dict) -> bytes:
+        self.sequence += 1
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.sequence, event["type"].encode(), orjson.dumps(event))
+
+
+class EventBus:
+    def __init__(self, url: str):
+        self.backend = create_backend(url, self.dispatch)
+        self.subscriptions = set()
+
+    async def subscribe(self, db: AsyncSession, user: AuthenticatedUser) -> Subscription:
+        project_ids, task_ids = set(), set()
+        if user.role != "admin":
+            access = await access_cache.get(db, user.employee_id)
+            project_ids = access.project_ids
+            if user.role == "member":
+                task_ids = access.task_ids
+
+        subscription = Subscription(user, project_ids, task_ids)
+        await self.backend.start()
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    # Called after the change is committed; a failed publish never fails the request
+    async def publish(self, *events: dict):
+        if not events:
+            return
+        try:
+            await self.backend.publish(list(events))
+        except Exception as e:
+            print(f"Event publish failed: {e}")
+
+    def dispatch(self, events: List[dict]):
+        for subscription in list(self.subscriptions):
+            for event in events:
+                scoped = subscription.scope(event)
+                if scoped is not None:
+                    subscription.deliver(scoped)
+
+    async def stream(self, subscription: Subscription):
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+
+                if subscription.overflowed:
+                    yield subscription.encode(change_event("overflow"))
+                    return
+                yield subscription.encode(event)
+
+                # The stream was scoped to the old role; the client reconnects with the new one
+                if event["type"] == "employee.role_changed" and event["employee_id"] == subscription.employee_id:
+                    return
+                if event["type"] == "tasks.imported" and subscription.role == "member":
+                    await subscription.reload_tasks()
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend.name, "subscribers": len(self.subscriptions)}
+
+    async def close(self):
+        await self.backend.close()
+
+
+event_bus = EventBus(EVENTS_URL)
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator
+from sqlalchemy import select, Table
+from database import ReadSessionLocal
+from models import Project as DBProject, Task as DBTask, EmployeeTask, EmployeeProject
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Exportable tables by URL name, each streamed in primary key order
+EXPORT_TABLES = {
+    "projects": DBProject.__table__,
+    "tasks": DBTask.__table__,
+    "employee-projects": EmployeeProject.__table__,
+    "employee-tasks": EmployeeTask.__table__,
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def ndjson_lines(columns, rows) -> str:
+    return "".join(json.dumps(dict(zip(columns, map(json_value, row)))) + "\n" for row in rows)
+
+
+def csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([json_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+# Rows come from a server-side cursor one batch at a time, so memory stays flat whatever the table size.
+# The session is opened here because the response body is produced after the request handler returns.
+async def stream_table(table: Table, format: str) -> AsyncIterator[str]:
+    columns = [column.name for column in table.columns]
+    query = select(*table.columns).order_by(*table.primary_key.columns).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    if format == "csv":
+        yield csv_lines([columns])
+
+    async with ReadSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield csv_lines(rows) if format == "csv" else ndjson_lines(columns, rows)
@@ -0,0 +1,26 @@
+import os
+from typing import Type
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# List endpoints build plain dicts from database rows and serialize them with orjson,
+# skipping the per-row model construction and FastAPI's response_model re-validation.
+# The schemas stay the output contract: set FAST_JSON_VALIDATE=true in development to check every body against them.
+FAST_JSON_VALIDATE = os.getenv("FAST_JSON_VALIDATE", "false").lower() == "true"
+
+
+def contract(model: Type[BaseModel], content):
+    if FAST_JSON_VALIDATE:
+        model.model_validate(content)
+    return content
+
+
+def fast_json(model: Type[BaseModel], content) -> ORJSONResponse:
+    return ORJSONResponse(contract(model, content))
+
+
+def dumps(content) -> bytes:
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    return orjson.dumps(content)
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models import Job
+from schemas import AuthenticatedUser
+
+# Workers per app process; 0 leaves the queue to other processes
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds before the first retry, doubled for every further one
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# An attempt is cancelled after JOB_TIMEOUT seconds; a job still marked running after that lost its worker
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "900"))
+
+# kind -> async handler(db, job) returning the job's JSON result. Handlers run in their own session,
+# commit their own work, and must be safe to run again after a failed or interrupted attempt.
+JOB_HANDLERS: Dict[str, Callable[[AsyncSession, "JobContext"], Awaitable[Any]]] = {}
+
+
+def job_handler(kind: str):
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+# Naive UTC, like the jobs table's DateTime columns
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobContext:
+    def __init__(self, runner: "JobRunner", job: Job):
+        self.runner = runner
+        self.job_id = job.job_id
+        self.payload = json.loads(job.payload) if job.payload else {}
+        self.created_by = job.created_by
+
+    # The attempt's transaction is still open, so progress is kept in memory and written to the row when it ends
+    def progress(self, done: int, total: Optional[int] = None):
+        self.runner.progress[self.job_id] = (done, total)
+
+
+def claimable(at: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= at),
+        and_(Job.status == "running", Job.started_at <= at - timedelta(seconds=JOB_TIMEOUT)),
+    )
+
+
+# Workers poll the jobs table, so every app process (and a restarted one) picks up the same queue.
+# A job is claimed with a conditional UPDATE; only one worker's UPDATE matches.
+class JobRunner:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.tasks = []
+        self.progress: Dict[int, Tuple[int, Optional[int]]] = {}
+        self.wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        # Created here so it belongs to the app's event loop
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self.work(self.wakeup)) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def wake(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def work(self, wakeup: asyncio.Event):
+        while True:
+            wakeup.clear()
+            try:
+                job = await self.claim()
+            except Exception as e:
+                print(f"Could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run(job)
+
+    async def claim(self) -> Optional[Job]:
+        async with AsyncSessionLocal() as db:
+            while True:
+                at = utcnow()
+                job_id = await db.scalar(
+                    select(Job.job_id).where(claimable(at)).order_by(Job.run_after, Job.job_id).limit(1)
+                )
+                if job_id is None:
+                    return None
+
+                claimed = await db.execute(
+                    update(Job).where(Job.job_id == job_id, claimable(at))
+                    .values(status="running", attempts=Job.attempts + 1, started_at=at),
+                    execution_options={"synchronize_session": False}
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return await db.get(Job, job_id)
+
+    async def run(self, job: Job):
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            await self.finish(job, "failed", error=f"Unknown job kind {job.kind}")
+            return
+        # Claimed again after its worker went away, with no attempts left
+        if job.attempts > job.max_attempts:
+            await self.finish(job, "failed", error=f"Job did not finish within {JOB_TIMEOUT:g} s")
+            return
+
+        self.progress[job.job_id] = (job.progress_done, job.progress_total)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await asyncio.wait_for(handler(db, JobContext(self, job)), JOB_TIMEOUT)
+        except asyncio.CancelledError:
+            # Shutting down: the attempt was rolled back, so hand the job back without using up an attempt
+            await asyncio.shield(self.save(job.job_id, status="queued", attempts=Job.attempts - 1, run_after=utcnow()))
+            raise
+        except asyncio.TimeoutError:
+            await self.retry(job, f"Job did not finish within {JOB_TIMEOUT:g} s")
+        except HTTPException as e:
+            # Client errors (the project is gone, the role is invalid) fail the same way every time
+            if e.status_code < 500:
+                await self.finish(job, "failed", error=e.detail)
+            else:
+                await self.retry(job, e.detail)
+        except Exception as e:
+            print(f"Job {job.job_id} ({job.kind}) failed: {e}")
+            await self.retry(job, str(e) or type(e).__name__)
+        else:
+            await self.finish(job, "succeeded", result=result)
+        finally:
+            self.progress.pop(job.job_id, None)
+
+    async def retry(self, job: Job, error):
+        if job.attempts >= job.max_attempts:
+            await self.finish(job, "failed", error=error)
+            return
+        delay = JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        await self.save(job.job_id, status="queued", error=json.dumps(error), run_after=utcnow() + timedelta(seconds=delay))
+
+    async def finish(self, job: Job, status: str, result=None, error=None):
+        await self.save(
+            job.job_id,
+            status=status,
+            result=json.dumps(result) if result is not None else None,
+            error=json.dumps(error) if error is not None else None,
+            finished_at=utcnow(),
+        )
+
+    async def save(self, job_id: int, **values):
+        if job_id in self.progress:
+            values["progress_done"], values["progress_total"] = self.progress[job_id]
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job).where(Job.job_id == job_id).values(**values),
+                execution_options={"synchronize_session": False}
+            )
+            await db.commit()
+
+
+job_runner = JobRunner(JOB_WORKERS)
+
+
+async def submit(db: AsyncSession, kind: str, payload: dict, user: AuthenticatedUser, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    at = utcnow()
+    job = Job(
+        kind=kind,
+        status="queued",
+        payload=json.dumps(payload),
+        attempts=0,
+        max_attempts=max_attempts,
+        progress_done=0,
+        created_by=user.employee_id,
+        created_at=at,
+        run_after=at,
+    )
+    db.add(job)
+    await db.commit()
+    job_runner.wake()
+    return job
+
+
+# Jobs running in this process report live progress; the others show what their last attempt wrote
+def job_response(job: Job) -> dict:
+    done, total = job_runner.progress.get(job.job_id, (job.progress_done, job.progress_total))
+    return {
+        "job_id": job.job_id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "progress_done": done,
+        "progress_total": total,
+        "result": json.loads(job.result) if job.result else None,
+        "error": json.loads(job.error) if job.error else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# 202 Accepted, pointing at the job's status endpoint
+def accepted(job: Job) -> ORJSONResponse:
+    return ORJSONResponse(job_response(job), status_code=202, headers={"Location": f"/jobs/{job.job_id}"})
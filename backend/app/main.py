@@ -1,35 +1,70 @@
 import os 
-from fastapi import FastAPI, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 from contextlib import asynccontextmanager
-from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject 
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject, Job 
 from schemas import *
 from auth import auth_router
-from database import SessionLocal, engine, Base
+from database import async_engine, read_async_engine, version_async_engine, get_db, get_read_db, pool_stats
 from sqlalchemy.exc import OperationalError
-from sqlalchemy import inspect
-from jose import jwt, JWTError
+from sqlalchemy import select, union
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from auth import verify_jwt
+from fastapi.responses import RedirectResponse, StreamingResponse, PlainTextResponse, Response
+from auth import verify_jwt, invalidate_user, token_cache, user_cache, revoke_session, clear_session_cookies, REFRESH_COOKIE
+from queries import get_project_responses, get_task_responses, get_employee_task_responses, employee_tasks_query
+from pagination import Page, MAX_PAGE_SIZE
+from assignments import check_employee_roles, add_links, replace_links
+from migrations import current_version, upgrade, LATEST_VERSION
+from oauth import close_http_client
+from bulk import read_items, collect_items, replay_items, import_tasks, update_task_statuses
+from export import EXPORT_TABLES, MEDIA_TYPES, stream_table
+from progress import adjust_task_counts, task_added, task_removed, status_changed, get_project_progress
+from fast_json import fast_json, contract
+from response_cache import response_cache, project_tags, project_tasks_tags, task_tags, employee_tags, EMPLOYEES_TAG
+from search import search, SEARCH_KINDS
+from access import access_cache, task_projects, require_project_access, require_task_access
+from batch import run_batch, BATCH_MAX_REQUESTS
+from sync import sync_changes, DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT
+from changes import delete_tracked, record_tombstones
+from events import event_bus, change_event, project_event, task_event
+from jobs import JobContext, job_runner, job_handler, submit, job_response, accepted
+from metrics import MetricsMiddleware, instrument_engine, register_collector, render_metrics, stats_samples
+
+
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+# Bearer token Prometheus must send to scrape /metrics; leave unset to keep it open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        if not tables:
-            Base.metadata.create_all(bind=engine)
-            print("Database and schema initialized successfully.")
-        else:
-            print("Database schema already exists.")
+        async with async_engine.connect() as conn:
+            version = await conn.run_sync(current_version)
+            if version == LATEST_VERSION:
+                print("Database schema is up to date.")
+            elif MIGRATE_ON_STARTUP:
+                applied = await conn.run_sync(upgrade)
+                print(f"Database schema migrated to version {LATEST_VERSION}: {', '.join(applied)}")
+            else:
+                print(f"Database schema is at version {version}, latest is {LATEST_VERSION}. Run `python migrate.py upgrade`.")
     except OperationalError as e:
         print("Database connection failed or schema is missing.")
         print(f"Error details: {str(e)}")
-    
+
+    job_runner.start()
     yield
+    await job_runner.stop()
+    await close_http_client()
+    await event_bus.close()
+    await async_engine.dispose()
+    if read_async_engine is not None:
+        await read_async_engine.dispose()
+    if version_async_engine is not None:
+        await version_async_engine.dispose()
     print("Application shutting down.")
 
 
@@ -46,83 +81,138 @@ app.add_middleware(
     allow_methods=["*"], 
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
-app.include_router(auth_router)
+instrument_engine(async_engine.sync_engine)
+if read_async_engine is not None:
+    instrument_engine(read_async_engine.sync_engine)
 
-SECRET_KEY = os.getenv("JWT_SECRET")  
-ALGORITHM = "HS256"
 
+# Pool, auth cache and response cache stats, read on every scrape
+def service_stats() -> dict:
+    samples = stats_samples("db_pool", "pool", pool_stats(), counters=("checkouts", "wait_seconds_total"))
+    samples.update(stats_samples("cache", "cache", {
+        "auth_tokens": token_cache.stats(),
+        "auth_users": user_cache.stats(),
+        "response": response_cache.stats(),
+        "access": access_cache.stats(),
+    }, counters=("hits", "misses")))
+    events = event_bus.stats()
+    samples.update(stats_samples("events", "backend", {events["backend"]: events}))
+    return samples
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-@app.get("/get-userdetails")
-async def get_user_details(request: Request, db: Session = Depends(get_db)):
-    token = request.cookies.get("access_token")
-    if not token:
-        raise HTTPException(status_code=401, detail="Token missing or invalid")
+register_collector(service_stats)
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        employee_id = payload.get("employee_id")
-        if employee_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id).first()
-        if not employee:
-            raise HTTPException(status_code=401, detail="Employee not found")
-        
-        return employee
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+app.include_router(auth_router)
+
+@app.get("/get-userdetails", response_model=AuthenticatedUser)
+async def get_user_details(user: AuthenticatedUser = Depends(verify_jwt)):
+    return user
     
 
+# Prometheus metrics
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Connection pool usage (ADMIN)
+@app.get("/metrics/pool")
+async def get_pool_metrics(user: AuthenticatedUser = Depends(verify_jwt)):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    return pool_stats()
+
+
+# Response cache usage (ADMIN)
+@app.get("/metrics/response-cache")
+async def get_response_cache_metrics(user: AuthenticatedUser = Depends(verify_jwt)):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    return response_cache.stats()
+
+
 # Get all projects (ADMIN)
 @app.get("/projects", response_model=ProjectListResponse)
 async def get_projects(
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    status: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    start_after: Optional[datetime] = None,
+    end_before: Optional[datetime] = None,
+    name: Optional[str] = None,
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        projects = db.query(DBProject).all()
+        projects = select(DBProject)
+        if status:
+            projects = projects.where(DBProject.project_status == status)
+        if owner_id is not None:
+            projects = projects.where(DBProject.project_owner_id == owner_id)
+        if start_after:
+            projects = projects.where(DBProject.start_date >= start_after)
+        if end_before:
+            projects = projects.where(DBProject.end_date <= end_before)
+        if name:
+            projects = projects.where(DBProject.name.startswith(name, autoescape=True))
+
+        project_list = await get_project_responses(db, projects, page)
+
+        return fast_json(ProjectListResponse, {
+            "projects": project_list,
+            "project_count": await page.total(db, projects, DBProject.project_id, project_list),
+            "next_cursor": page.next_cursor(project_list, "project_id"),
+        })
 
-        project_list = []
-        for project in projects:
-            project_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == project.project_owner_id).first()
-            if not project_owner:
-                raise HTTPException(status_code=404, detail=f"Project owner with ID {project.project_owner_id} not found")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
-            managers = db.query(DBEmployee).join(EmployeeProject).filter(
-                EmployeeProject.project_id == project.project_id, DBEmployee.role == "manager"
-            ).all()
+# Task progress for every project the user can see (ADMIN: all, others: assigned projects)
+@app.get("/projects/summary", response_model=ProjectSummaryListResponse)
+async def get_projects_summary(
+    status: Optional[str] = None,
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    try:
+        projects = select(DBProject)
+        if user.role != "admin":
+            projects = projects.where(DBProject.project_id.in_((await access_cache.get(db, user.employee_id)).project_ids))
+        if status:
+            projects = projects.where(DBProject.project_status == status)
 
-            members = db.query(DBEmployee).join(EmployeeProject).filter(
-                EmployeeProject.project_id == project.project_id, DBEmployee.role == "member"
-            ).all()
+        rows = (await db.scalars(page.apply(projects, DBProject.project_id))).all()
+        progress = await get_project_progress(db, [project.project_id for project in rows])
 
-            project_list.append(ProjectResponse(
+        project_list = [
+            ProjectSummary(
                 project_id=project.project_id,
                 project_name=project.name,
-                description=project.description,
-                start_date=project.start_date,
-                end_date=project.end_date,
                 project_status=project.project_status,
-                project_owner_id=project.project_owner_id,
-                project_owner_name=project_owner.name,
-                managers=[{"employee_id" : manager.employee_id, "name" :manager.name} for manager in managers],
-                members=[{"employee_id" : member.employee_id, "name" : member.name} for member in members],
-            ))
+                end_date=project.end_date,
+                progress=progress[project.project_id]
+            )
+            for project in rows
+        ]
 
-        return ProjectListResponse(
+        return ProjectSummaryListResponse(
             projects=project_list,
-            project_count=len(projects)
+            project_count=await page.total(db, projects, DBProject.project_id, project_list),
+            next_cursor=page.next_cursor(project_list, "project_id")
         )
 
     except HTTPException as e:
@@ -131,47 +221,118 @@ async def get_projects(
         print(e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
+# Full-text search over the projects and tasks the user can see, best matches first
+@app.get("/search", response_model=SearchResponse)
+async def search_projects_and_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if kind is not None and kind not in SEARCH_KINDS:
+        raise HTTPException(status_code=400, detail=f"Invalid kind: {kind}. Allowed kinds are {', '.join(SEARCH_KINDS)}.")
+
+    try:
+        results = await search(db, user, q, kind, limit, offset)
+
+        return fast_json(SearchResponse, {
+            "results": results,
+            "next_offset": offset + limit if len(results) == limit else None,
+        })
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
+# Live change events for the projects and tasks the user can see, as Server-Sent Events
+@app.get("/events")
+async def stream_events(
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    subscription = await event_bus.subscribe(db, user)
+    return StreamingResponse(
+        event_bus.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Rows changed since the token from the previous call, plus tombstones for deleted ones; no token gives a full snapshot.
+# Keep calling with next_token while has_more is set.
+@app.get("/sync", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_SYNC_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    try:
+        return fast_json(SyncResponse, await sync_changes(db, user, since, limit))
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
+# Run many GET requests against the routes of this API in one round trip, authenticated once and over one read session
+@app.post("/batch", response_model=BatchResponse)
+async def batch_requests(
+    batch: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {BATCH_MAX_REQUESTS} requests")
+
+    try:
+        return Response(await run_batch(request.scope, db, user, batch.requests), media_type="application/json")
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
 # Get project by id (ADMIN / MANAGER / EMPLOYEE)
 @app.get("/projects/{project_id}", response_model=ProjectResponse)
 async def get_project_by_id(
     project_id: int, 
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)  
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)  
 ):
 
     if user.role != "admin" and user.role != "manager" and user.role != "member":
         raise HTTPException(status_code=403, detail="Access forbidden: Unauthorized User")
 
+    await require_project_access(db, user, project_id)
+    cached = await response_cache.get(request, user)
+    if cached is not None:
+        return cached
+
     try:
-        project = db.query(DBProject).filter(DBProject.project_id == project_id).first()
+        projects = await get_project_responses(db, select(DBProject).where(DBProject.project_id == project_id))
 
-        if not project:
+        if not projects:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        project_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == project.project_owner_id).first()
-        if not project_owner:
-            raise HTTPException(status_code=404, detail="Project owner not found")
-
-        managers = db.query(DBEmployee).join(EmployeeProject).filter(
-            EmployeeProject.project_id == project.project_id, DBEmployee.role == "manager"
-        ).all()
-
-        members = db.query(DBEmployee).join(EmployeeProject).filter(
-            EmployeeProject.project_id == project.project_id, DBEmployee.role == "member"
-        ).all()
-
-        return ProjectResponse(
-            project_id=project.project_id,
-            project_name=project.name,
-            description=project.description,
-            start_date=project.start_date,
-            end_date=project.end_date,
-            project_status=project.project_status,
-            project_owner_id=project.project_owner_id,
-            project_owner_name=project_owner.name,
-            managers=[{"employee_id" : manager.employee_id, "name" :manager.name} for manager in managers],
-            members=[{"employee_id" : member.employee_id, "name" : member.name} for member in members],
-        )
+        project = projects[0]
+        return await response_cache.put(request, user, contract(ProjectResponse, project), [
+            *project_tags(project_id),
+            # Task changes move the progress counts
+            *project_tasks_tags(project_id),
+            *employee_tags(project["project_owner_id"], *(e["employee_id"] for e in project["managers"] + project["members"])),
+        ])
 
     except HTTPException as e:
         raise e  
@@ -185,14 +346,16 @@ async def get_project_by_id(
 @app.post("/projects", response_model=ProjectCreate)
 async def create_project(
     project: ProjectBase,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin":
        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
 
     try:
+        await check_employee_roles(db, project.manager_ids, project.employee_ids)
+
         db_project = DBProject(
             name=project.project_name,
             description=project.description,
@@ -203,25 +366,19 @@ async def create_project(
         )
 
         db.add(db_project)
-        db.commit()
-
-        for manager_id in project.manager_ids:
-            manager = db.query(DBEmployee).filter(DBEmployee.employee_id == manager_id, DBEmployee.role == "manager").first()
-            if not manager:
-                raise HTTPException(status_code=404, detail=f"Manager with ID {manager_id} not found")
-            db_employee_project = EmployeeProject(project_id=db_project.project_id, employee_id=manager_id)
-            db.add(db_employee_project)
-
-        for employee_id in project.employee_ids:
-            employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id, DBEmployee.role == "member").first()
-            if not employee:
-                raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
-            db_employee_project = EmployeeProject(project_id=db_project.project_id, employee_id=employee_id)
-            db.add(db_employee_project)
+        await db.flush()
 
-        
-        db.commit()
-        db.refresh(db_project)
+        added = await add_links(
+            db, EmployeeProject, EmployeeProject.project_id, db_project.project_id,
+            [*(project.manager_ids or []), *(project.employee_ids or [])]
+        )
+
+        await db.commit()
+        await db.refresh(db_project)
+        access_cache.grant(added, project_id=db_project.project_id)
+        await event_bus.publish(project_event(
+            "project.created", db_project, [*(project.manager_ids or []), *(project.employee_ids or [])]
+        ))
 
         return ProjectCreate(
             project_id=db_project.project_id,
@@ -243,94 +400,111 @@ async def create_project(
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
     
-# Update Project by ID(ADMIN)
-@app.put("/projects/{project_id}", response_model=ProjectUpdateResponse)
+# Update Project by ID(ADMIN). background=true runs it, with its reassignments, as a job and answers 202 with the job
+@app.put("/projects/{project_id}", response_model=ProjectUpdateResponse, responses={202: {"model": JobResponse}})
 async def update_project(
     project_id: int,
     project: ProjectUpdate,  
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        
-        db_project = db.query(DBProject).filter(DBProject.project_id == project_id).first()
-
-        if not db_project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        project_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == db_project.project_owner_id).first()
-
-        if not project_owner:
-            raise HTTPException(status_code=404, detail=f"Project owner with ID {db_project.project_owner_id} not found")
-
-        db_project.name = project.project_name
-        db_project.description = project.description
-        db_project.start_date = project.start_date
-        db_project.end_date = project.end_date
-        # db_project.project_status= project.project_status
-        # db_project.project_owner_id = project_owner.employee_id  
-
-        db.query(EmployeeProject).filter(EmployeeProject.project_id == project_id).delete()
-
-        for manager_id in project.manager_ids:
-            manager = db.query(DBEmployee).filter(DBEmployee.employee_id == manager_id, DBEmployee.role == "manager").first()
-            if not manager:
-                raise HTTPException(status_code=404, detail=f"Manager with ID {manager_id} not found")
-            db_employee_project = EmployeeProject(project_id=db_project.project_id, employee_id=manager_id)
-            db.add(db_employee_project)
-
-        for employee_id in project.employee_ids:
-            employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id, DBEmployee.role == "member").first()
-            if not employee:
-                raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
-            db_employee_project = EmployeeProject(project_id=db_project.project_id, employee_id=employee_id)
-            db.add(db_employee_project)
-
-        db.commit()
-        db.refresh(db_project)
-
-        return {
-            "project_name": db_project.name,
-            "description": db_project.description,
-            "start_date": db_project.start_date,
-            "end_date": db_project.end_date,
-
-            "project_status": db_project.project_status,
-
-            "project_owner_id": db_project.project_owner_id,
-            "project_owner_name": project_owner.name,
-            "managers": [manager_id for manager_id in project.manager_ids],
-            "members": [employee_id for employee_id in project.employee_ids],
-        }
+        if background:
+            if not await db.scalar(select(DBProject.project_id).where(DBProject.project_id == project_id)):
+                raise HTTPException(status_code=404, detail="Project not found")
+            await check_employee_roles(db, project.manager_ids, project.employee_ids)
+            payload = {"project_id": project_id, "project": project.model_dump(mode="json")}
+            return accepted(await submit(db, "project.update", payload, user))
+        return await apply_project_update(db, project_id, project)
 
     except HTTPException as e:
         raise e  
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
+async def apply_project_update(db: AsyncSession, project_id: int, project: ProjectUpdate) -> dict:
+    db_project = await db.scalar(select(DBProject).where(DBProject.project_id == project_id))
+
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    project_owner = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == db_project.project_owner_id))
+
+    if not project_owner:
+        raise HTTPException(status_code=404, detail=f"Project owner with ID {db_project.project_owner_id} not found")
+
+    db_project.name = project.project_name
+    db_project.description = project.description
+    db_project.start_date = project.start_date
+    db_project.end_date = project.end_date
+    # db_project.project_status= project.project_status
+    # db_project.project_owner_id = project_owner.employee_id  
+
+    await check_employee_roles(db, project.manager_ids, project.employee_ids)
+    added, removed = await replace_links(
+        db, EmployeeProject, EmployeeProject.project_id, db_project.project_id,
+        [*(project.manager_ids or []), *(project.employee_ids or [])]
+    )
+
+    await db.commit()
+    await db.refresh(db_project)
+    access_cache.grant(added, project_id=project_id)
+    access_cache.revoke(removed, project_id=project_id)
+    await response_cache.invalidate(*project_tags(project_id))
+    await event_bus.publish(project_event(
+        "project.updated", db_project, [*(project.manager_ids or []), *(project.employee_ids or [])]
+    ))
+
+    return {
+        "project_name": db_project.name,
+        "description": db_project.description,
+        "start_date": db_project.start_date,
+        "end_date": db_project.end_date,
+
+        "project_status": db_project.project_status,
+
+        "project_owner_id": db_project.project_owner_id,
+        "project_owner_name": project_owner.name,
+        "managers": [manager_id for manager_id in project.manager_ids],
+        "members": [employee_id for employee_id in project.employee_ids],
+    }
+
+
+# replace_links only applies the difference, so running it again after a failed attempt is safe
+@job_handler("project.update")
+async def run_project_update(db: AsyncSession, job: JobContext):
+    project = ProjectUpdate(**job.payload["project"])
+    return jsonable_encoder(await apply_project_update(db, job.payload["project_id"], project))
     
 #Update Project Status to Completed (ADMIN)
 @app.post("/projects/mark-complete")
 async def complete_project(
     project: ProjectComplete,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "manager":
         raise HTTPException(status_code=403, detail="Access forbidden: Managers only")
     
     try:
-        db_project = db.query(DBProject).filter(DBProject.project_id == project.project_id).first()
+        db_project = await db.scalar(select(DBProject).where(DBProject.project_id == project.project_id))
 
         if not db_project:
             raise HTTPException(status_code=404, detail="Project not found")
         
         db_project.project_status = project.project_status
 
-        db.commit()
+        await db.commit()
+        await response_cache.invalidate(*project_tags(project.project_id))
+        await event_bus.publish(change_event(
+            "project.status_changed", project_id=db_project.project_id, status=db_project.project_status
+        ))
         
         return {
             "project_id" : db_project.project_id,
@@ -346,26 +520,24 @@ async def complete_project(
 
 
 
-#Delete Project by ID (ADMIN) 
-@app.delete("/projects/{project_id}", response_model=dict)
+#Delete Project by ID (ADMIN). background=true runs it as a job and answers 202 with the job
+@app.delete("/projects/{project_id}", response_model=dict, responses={202: {"model": JobResponse}})
 async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        db_project = db.query(DBProject).filter(DBProject.project_id == project_id).first()
-
-        if not db_project:
+        if not await db.scalar(select(DBProject.project_id).where(DBProject.project_id == project_id)):
             raise HTTPException(status_code=404, detail="Project not found")
 
-        db.delete(db_project)
-        db.commit()
-
-        return {"message": f"Project with ID {project_id} has been deleted successfully"}
+        if background:
+            return accepted(await submit(db, "project.delete", {"project_id": project_id}, user))
+        return await remove_project(db, project_id)
 
     except HTTPException as e:
         raise e  
@@ -374,27 +546,88 @@ async def delete_project(
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
 
+async def remove_project(db: AsyncSession, project_id: int) -> dict:
+    project_tasks = select(DBTask.task_id).where(DBTask.project_id == project_id)
+    affected = (await db.scalars(union(
+        select(EmployeeProject.employee_id).where(EmployeeProject.project_id == project_id),
+        select(EmployeeTask.employee_id).where(EmployeeTask.task_id.in_(project_tasks)),
+    ))).all()
+
+    # The database deletes the tasks, links and task counts with the project (ON DELETE CASCADE);
+    # /sync still needs tombstones for them
+    await record_tombstones(db, EmployeeTask, EmployeeTask.task_id.in_(project_tasks))
+    await record_tombstones(db, DBTask, DBTask.project_id == project_id)
+    await record_tombstones(db, EmployeeProject, EmployeeProject.project_id == project_id)
+    await delete_tracked(db, DBProject, DBProject.project_id == project_id)
+    await db.commit()
+    # Reloaded on their next request; the cascade removed the tasks without going through delete_task,
+    # so the task -> project map is dropped too (other workers' entries expire after ACCESS_CACHE_TTL)
+    access_cache.forget(*affected)
+    task_projects.clear()
+    await response_cache.invalidate(*project_tags(project_id), *project_tasks_tags(project_id))
+    await event_bus.publish(change_event("project.deleted", project_id=project_id))
+
+    return {"message": f"Project with ID {project_id} has been deleted successfully"}
+
+
+# A project that is already gone was deleted by an earlier attempt
+@job_handler("project.delete")
+async def run_project_delete(db: AsyncSession, job: JobContext):
+    project_id = job.payload["project_id"]
+    if not await db.scalar(select(DBProject.project_id).where(DBProject.project_id == project_id)):
+        return {"message": f"Project with ID {project_id} has been deleted successfully"}
+    return await remove_project(db, project_id)
+
+
+# Stream a whole table as NDJSON or CSV (ADMIN)
+@app.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = "ndjson",
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export {table}, expected one of {', '.join(EXPORT_TABLES)}")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {format}, expected one of {', '.join(MEDIA_TYPES)}")
+
+    return StreamingResponse(
+        stream_table(EXPORT_TABLES[table], format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
+
+
 # Get all managers (ADMIN)
 @app.get("/managers", response_model=ManagerListResponse)
 async def get_all_managers(
-        db: Session = Depends(get_db), 
-        user: DBEmployee = Depends(verify_jwt)
+        name: Optional[str] = None,
+        page: Page = Depends(),
+        db: AsyncSession = Depends(get_read_db), 
+        user: AuthenticatedUser = Depends(verify_jwt)
     ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        managers = db.query(DBEmployee).filter(DBEmployee.role == "manager").all()
-
-        if not managers:
-            return ManagerListResponse(managers=[], manager_count=0)
-
-        manager_list = [ManagerResponse.model_validate(manager) for manager in managers]
-
-        return ManagerListResponse(
-            managers=manager_list,
-            manager_count=len(manager_list)
-        )
+        managers = select(DBEmployee).where(DBEmployee.role == "manager")
+        if name:
+            managers = managers.where(DBEmployee.name.startswith(name, autoescape=True))
+
+        manager_list = [dict(row) for row in (await db.execute(
+            page.apply(managers, DBEmployee.employee_id).with_only_columns(
+                DBEmployee.employee_id, DBEmployee.name, DBEmployee.email_id, DBEmployee.role
+            )
+        )).mappings()]
+
+        return fast_json(ManagerListResponse, {
+            "managers": manager_list,
+            "manager_count": await page.total(db, managers, DBEmployee.employee_id, manager_list),
+            "next_cursor": page.next_cursor(manager_list, "employee_id"),
+        })
 
     except HTTPException as e:
         raise e
@@ -404,24 +637,30 @@ async def get_all_managers(
 # Get all members (ADMIN)
 @app.get("/members", response_model=MemberListResponse)
 async def get_all_members(
-        db: Session = Depends(get_db), 
-        user: DBEmployee = Depends(verify_jwt)
+        name: Optional[str] = None,
+        page: Page = Depends(),
+        db: AsyncSession = Depends(get_read_db), 
+        user: AuthenticatedUser = Depends(verify_jwt)
     ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        members = db.query(DBEmployee).filter(DBEmployee.role == "member").all()
-
-        if not members:
-            return MemberListResponse(members=[], member_count=0)
-
-        member_list = [MemberResponse.model_validate(member) for member in members]
-
-        return MemberListResponse(
-            members=member_list,
-            member_count=len(member_list)
-        )
+        members = select(DBEmployee).where(DBEmployee.role == "member")
+        if name:
+            members = members.where(DBEmployee.name.startswith(name, autoescape=True))
+
+        member_list = [dict(row) for row in (await db.execute(
+            page.apply(members, DBEmployee.employee_id).with_only_columns(
+                DBEmployee.employee_id, DBEmployee.name, DBEmployee.email_id, DBEmployee.role
+            )
+        )).mappings()]
+
+        return fast_json(MemberListResponse, {
+            "members": member_list,
+            "member_count": await page.total(db, members, DBEmployee.employee_id, member_list),
+            "next_cursor": page.next_cursor(member_list, "employee_id"),
+        })
 
     except HTTPException as e:
         raise e
@@ -431,25 +670,37 @@ async def get_all_members(
 # Get all employees (ADMIN, MANAGER)
 @app.get("/employees", response_model=EmployeeListResponse)
 async def get_all_employees(
-        db: Session = Depends(get_db), 
-        user: DBEmployee = Depends(verify_jwt)
+        request: Request,
+        role: Optional[str] = None,
+        name: Optional[str] = None,
+        page: Page = Depends(),
+        db: AsyncSession = Depends(get_read_db), 
+        user: AuthenticatedUser = Depends(verify_jwt)
     ):
     
     if user.role != "admin" and user.role != "manager":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins and Managers only")
 
-    try:
-        employees = db.query(DBEmployee).all()
-
-        if not employees:
-            return EmployeeListResponse(employees=[], employee_count=0)
-
-        employee_list = [EmployeeResponse.model_validate(employee) for employee in employees]
+    cached = await response_cache.get(request, user)
+    if cached is not None:
+        return cached
 
-        return EmployeeListResponse(
-            employees=employee_list,
-            employee_count=len(employee_list)
-        )
+    try:
+        employees = select(DBEmployee)
+        if role:
+            employees = employees.where(DBEmployee.role == role)
+        if name:
+            employees = employees.where(DBEmployee.name.startswith(name, autoescape=True))
+
+        employee_list = [dict(row) for row in (await db.execute(
+            page.apply(employees, DBEmployee.employee_id).with_only_columns(DBEmployee.employee_id, DBEmployee.name, DBEmployee.role)
+        )).mappings()]
+
+        return await response_cache.put(request, user, contract(EmployeeListResponse, {
+            "employees": employee_list,
+            "employee_count": await page.total(db, employees, DBEmployee.employee_id, employee_list),
+            "next_cursor": page.next_cursor(employee_list, "employee_id"),
+        }), [EMPLOYEES_TAG])
 
     except HTTPException as e:
         raise e
@@ -457,73 +708,103 @@ async def get_all_employees(
         print(e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
-# Change Roles (ADMIN)
-@app.put("/change-role", response_model=EmployeeResponse)
+# Change Roles (ADMIN). background=true runs it as a job and answers 202 with the job
+@app.put("/change-role", response_model=EmployeeResponse, responses={202: {"model": JobResponse}})
 async def update_employee_role(
     request: UpdateRoleRequest,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        employee = db.query(DBEmployee).filter(DBEmployee.employee_id == request.employee_id).first()
+        employee = await check_role_change(db, user.employee_id, request)
 
-        if not employee:
-            raise HTTPException(status_code=404, detail="Employee not found")
+        if background:
+            return accepted(await submit(db, "employee.change_role", request.model_dump(), user))
+        return await apply_role_change(db, employee, request.new_role)
 
-        valid_roles = {"member", "manager", "admin"}
-        if request.new_role not in valid_roles:
-            raise HTTPException(status_code=400, detail=f"Invalid role: {request.new_role}. Allowed roles are {valid_roles}.")
+    except HTTPException as e:
+        raise e  
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
-        if employee.employee_id == user.employee_id:
-            raise HTTPException(status_code=400, detail="You cannot change your own role.")
 
-        employee.role = request.new_role
+async def check_role_change(db: AsyncSession, admin_id: int, request: UpdateRoleRequest) -> DBEmployee:
+    employee = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == request.employee_id))
 
-        if request.new_role == "member":
-            db.query(EmployeeProject).filter(EmployeeProject.employee_id == request.employee_id).delete()
-        elif request.new_role == "manager":
-            db.query(EmployeeTask).filter(EmployeeTask.employee_id == request.employee_id).delete()
-            db.query(EmployeeProject).filter(EmployeeProject.employee_id == request.employee_id).delete()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
 
-        db.commit()
-        db.refresh(employee)
+    valid_roles = {"member", "manager", "admin"}
+    if request.new_role not in valid_roles:
+        raise HTTPException(status_code=400, detail=f"Invalid role: {request.new_role}. Allowed roles are {valid_roles}.")
 
-        return {
-            "employee_id": employee.employee_id,
-            "name": employee.name,
-            "role": employee.role
-        }
+    if employee.employee_id == admin_id:
+        raise HTTPException(status_code=400, detail="You cannot change your own role.")
+
+    return employee
 
-    except HTTPException as e:
-        raise e  
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+async def apply_role_change(db: AsyncSession, employee: DBEmployee, new_role: str) -> dict:
+    employee.role = new_role
+
+    if new_role == "member":
+        await delete_tracked(db, EmployeeProject, EmployeeProject.employee_id == employee.employee_id)
+    elif new_role == "manager":
+        await delete_tracked(db, EmployeeTask, EmployeeTask.employee_id == employee.employee_id)
+        await delete_tracked(db, EmployeeProject, EmployeeProject.employee_id == employee.employee_id)
+
+    await db.commit()
+    await db.refresh(employee)
+    invalidate_user(employee.employee_id)
+    access_cache.forget(employee.employee_id)
+    await response_cache.invalidate(*employee_tags(employee.employee_id), EMPLOYEES_TAG)
+    await event_bus.publish(change_event("employee.role_changed", employee_id=employee.employee_id, role=employee.role))
+
+    return {
+        "employee_id": employee.employee_id,
+        "name": employee.name,
+        "role": employee.role
+    }
+
+
+@job_handler("employee.change_role")
+async def run_role_change(db: AsyncSession, job: JobContext):
+    request = UpdateRoleRequest(**job.payload)
+    employee = await check_role_change(db, job.created_by, request)
+    return await apply_role_change(db, employee, request.new_role)
 
 @app.put("/tasks/update-status")
 async def update_task_status(
     request: UpdateTaskStatusRequest,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt),
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt),
 ):
     
     if user.role not in {"member", "manager", "admin"}:
         raise HTTPException(status_code=403, detail="Access forbidden: Insufficient permissions.")
 
     try: 
-        task = db.query(DBTask).filter(DBTask.task_id == request.task_id).first()
+        # Locked until commit, so a concurrent status change cannot apply its count delta from the same old status
+        task = await db.scalar(select(DBTask).where(DBTask.task_id == request.task_id).with_for_update())
 
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
 
+        await adjust_task_counts(db, status_changed(task.project_id, task.status, request.new_status))
         task.status = request.new_status
 
         try:
-            db.commit()
-            db.refresh(task)
+            await db.commit()
+            await db.refresh(task)
+            await response_cache.invalidate(*task_tags(task.task_id), *project_tasks_tags(task.project_id))
+            await event_bus.publish(change_event(
+                "task.status_changed", task_id=task.task_id, project_id=task.project_id, status=task.status
+            ))
             return {
                 "task_id": task.task_id,
                 "description": task.description,
@@ -532,7 +813,7 @@ async def update_task_status(
                 "owner_id": task.task_owner_id,
             }
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             print(e)
             raise HTTPException(status_code=500, detail="An error occurred while updating task status") from e
     except HTTPException as e:
@@ -543,36 +824,154 @@ async def update_task_status(
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
 
-# Logout
-@app.post("/logout", response_model=dict)
-async def logout(response: RedirectResponse):
-    
-    response.set_cookie(
-        key="access_token", 
-        value="", 
-        max_age=0,  
-        httponly=True,  
-        expires=0  
+# Create tasks in bulk from a JSON array, NDJSON or CSV upload (ADMIN, MANAGER).
+# background=true reads and validates the upload, then imports it as a job and answers 202 with the job.
+@app.post("/tasks/bulk", response_model=BulkResponse, responses={202: {"model": JobResponse}})
+async def bulk_create_tasks(
+    request: Request,
+    all_or_nothing: bool = False,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if user.role not in {"admin", "manager"}:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins and Managers only")
+
+    try:
+        if background:
+            items = await collect_items(read_items(request, BulkTaskCreate))
+            # An import that committed before failing would create its tasks twice, so it is not retried
+            return accepted(await submit(db, "tasks.import", {"items": items, "all_or_nothing": all_or_nothing}, user, max_attempts=1))
+        return await run_import(db, read_items(request, BulkTaskCreate), user.employee_id, all_or_nothing)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected error while importing tasks: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
+async def run_import(db: AsyncSession, items, owner_id: int, all_or_nothing: bool, progress=None) -> BulkResponse:
+    results, imported = await import_tasks(db, items, owner_id, progress)
+    response = await finish_bulk(db, results, all_or_nothing)
+    for task_id, (project_id, employee_ids) in imported.items():
+        task_projects.set(task_id, project_id)
+        access_cache.grant(employee_ids, task_id=task_id)
+    project_ids = {project_id for project_id, _ in imported.values()}
+    await response_cache.invalidate(*(tag for project_id in project_ids for tag in project_tasks_tags(project_id)))
+    await event_bus.publish(*(change_event("tasks.imported", project_id=project_id) for project_id in project_ids))
+    return response
+
+
+@job_handler("tasks.import")
+async def run_import_job(db: AsyncSession, job: JobContext):
+    items = job.payload["items"]
+    job.progress(0, len(items))
+    response = await run_import(
+        db, replay_items(items, BulkTaskCreate), job.created_by, job.payload["all_or_nothing"],
+        lambda done: job.progress(done, len(items))
+    )
+    return response.model_dump()
+
+
+# Update task statuses in bulk from a JSON array, NDJSON or CSV upload.
+# background=true reads and validates the upload, then applies it as a job and answers 202 with the job.
+@app.put("/tasks/bulk-status", response_model=BulkResponse, responses={202: {"model": JobResponse}})
+async def bulk_update_task_status(
+    request: Request,
+    all_or_nothing: bool = False,
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    if user.role not in {"member", "manager", "admin"}:
+        raise HTTPException(status_code=403, detail="Access forbidden: Insufficient permissions.")
+
+    try:
+        if background:
+            items = await collect_items(read_items(request, UpdateTaskStatusRequest))
+            return accepted(await submit(db, "tasks.update_status", {"items": items, "all_or_nothing": all_or_nothing}, user))
+        return await run_status_update(db, read_items(request, UpdateTaskStatusRequest), all_or_nothing)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected error while updating task statuses: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
+
+
+async def run_status_update(db: AsyncSession, items, all_or_nothing: bool, progress=None) -> BulkResponse:
+    results, updated = await update_task_statuses(db, items, progress)
+    response = await finish_bulk(db, results, all_or_nothing)
+    changes = {}
+    for task_id, (project_id, status) in updated.items():
+        changes.setdefault(project_id, []).append({"task_id": task_id, "status": status})
+    await response_cache.invalidate(
+        *(tag for task_id in updated for tag in task_tags(task_id)),
+        *(tag for project_id in changes for tag in project_tasks_tags(project_id))
     )
+    await event_bus.publish(*(
+        change_event("tasks.status_changed", project_id=project_id, changes=project_changes)
+        for project_id, project_changes in changes.items()
+    ))
+    return response
+
+
+# Setting the same statuses again is harmless, so unlike imports this job is retried
+@job_handler("tasks.update_status")
+async def run_status_update_job(db: AsyncSession, job: JobContext):
+    items = job.payload["items"]
+    job.progress(0, len(items))
+    response = await run_status_update(
+        db, replay_items(items, UpdateTaskStatusRequest), job.payload["all_or_nothing"],
+        lambda done: job.progress(done, len(items))
+    )
+    return response.model_dump()
+
+
+# Commit the whole batch once, or roll it back when all_or_nothing is set and an item failed
+async def finish_bulk(db: AsyncSession, results: List[BulkItemResult], all_or_nothing: bool):
+    failed = sum(1 for result in results if result.status == "error")
+    if failed and all_or_nothing:
+        await db.rollback()
+        for result in results:
+            if result.status == "created":
+                result.task_id = None
+            if result.status != "error":
+                result.status = "rolled_back"
+        raise HTTPException(status_code=422, detail=BulkResponse(results=results, succeeded=0, failed=failed).model_dump())
+
+    await db.commit()
+    return BulkResponse(results=results, succeeded=len(results) - failed, failed=failed)
 
-    return RedirectResponse(url="http://localhost:5173/login")
+
+# Logout: revoke the refresh session and clear both cookies
+@app.post("/logout", response_model=dict)
+async def logout(request: Request, db: AsyncSession = Depends(get_db)):
+    await revoke_session(db, request.cookies.get(REFRESH_COOKIE))
+
+    response = RedirectResponse(url="http://localhost:5173/login")
+    clear_session_cookies(response)
+    return response
 
 # Create a new task and assign employees (ADMIN, MANAGER)
 @app.post("/tasks/{project_id}",response_model=Task)
 async def create_task(
     task: TaskCreate,
     project_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin" and user.role != "manager":
         raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
 
     try:
-        db_project = db.query(DBProject).filter(DBProject.project_id == project_id).first()
+        db_project = await db.scalar(select(DBProject).where(DBProject.project_id == project_id))
         if not db_project:
             raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
 
+        await check_employee_roles(db, member_ids=task.employee_ids)
+
         db_task = DBTask(
             name=task.name,
             description=task.description,
@@ -585,17 +984,17 @@ async def create_task(
         
 
         db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+        await db.flush()
 
-        for employee_id in task.employee_ids:
-            employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id, DBEmployee.role == "member").first()
-            if not employee:
-                raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
-            db_employee_task = EmployeeTask(task_id=db_task.task_id, employee_id=employee_id)
-            db.add(db_employee_task)
+        added = await add_links(db, EmployeeTask, EmployeeTask.task_id, db_task.task_id, task.employee_ids)
+        await adjust_task_counts(db, task_added(project_id, db_task.status))
 
-        db.commit()
+        await db.commit()
+        await db.refresh(db_task)
+        task_projects.set(db_task.task_id, project_id)
+        access_cache.grant(added, task_id=db_task.task_id)
+        await response_cache.invalidate(*project_tasks_tags(project_id))
+        await event_bus.publish(task_event("task.created", db_task, task.employee_ids))
 
         return Task(
             task_id=db_task.task_id,
@@ -620,43 +1019,51 @@ async def create_task(
 @app.get("/projects/tasks/{project_id}", response_model=TaskListResponse)
 async def get_tasks_for_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    request: Request,
+    status: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    name: Optional[str] = None,
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role not in {"admin", "manager"}:
         raise HTTPException(status_code=403, detail="Access forbidden: Admins and Managers only")
 
+    await require_project_access(db, user, project_id)
+    cached = await response_cache.get(request, user)
+    if cached is not None:
+        return cached
+
     try:
-        db_project = db.query(DBProject).filter(DBProject.project_id == project_id).first()
+        db_project = await db.scalar(select(DBProject).where(DBProject.project_id == project_id))
         if not db_project:
             raise HTTPException(status_code=404, detail=f"Project with ID {project_id} not found")
 
-        db_tasks = db.query(DBTask).filter(DBTask.project_id == project_id).all()
-
-        task_list = []
-        for task in db_tasks:
-            task_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == task.task_owner_id).first()
-            if not task_owner:
-                raise HTTPException(status_code=404, detail=f"Task owner with ID {task.task_owner_id} not found")
-
-            employees = db.query(DBEmployee).join(EmployeeTask).filter(EmployeeTask.task_id == task.task_id).all()
-
-            task_list.append(TaskResponse(
-                task_id=task.task_id,
-                name=task.name,
-                description=task.description,
-                due_date=task.due_date,
-                status=task.status,
-                task_owner_id=task.task_owner_id,
-                task_owner_name=task_owner.name,
-                #employee_names=[employee.name for employee in employees]
-                members=[{"employee_id" : member.employee_id, "name" : member.name} for member in employees]
-            ))
-
-        return TaskListResponse(
-            tasks=task_list,
-            task_count=len(task_list)
-        )
+        tasks = select(DBTask).where(DBTask.project_id == project_id)
+        if status:
+            tasks = tasks.where(DBTask.status == status)
+        if owner_id is not None:
+            tasks = tasks.where(DBTask.task_owner_id == owner_id)
+        if due_after:
+            tasks = tasks.where(DBTask.due_date >= due_after)
+        if due_before:
+            tasks = tasks.where(DBTask.due_date <= due_before)
+        if name:
+            tasks = tasks.where(DBTask.name.startswith(name, autoescape=True))
+
+        task_list = await get_task_responses(db, tasks, page)
+
+        return await response_cache.put(request, user, contract(TaskListResponse, {
+            "tasks": task_list,
+            "task_count": await page.total(db, tasks, DBTask.task_id, task_list),
+            "next_cursor": page.next_cursor(task_list, "task_id"),
+        }), [
+            *project_tasks_tags(project_id),
+            *employee_tags(*(t["task_owner_id"] for t in task_list), *(m["employee_id"] for t in task_list for m in t["members"])),
+        ])
 
     except HTTPException as e:
         raise e
@@ -664,56 +1071,26 @@ async def get_tasks_for_project(
         print(f"Unexpected error while fetching tasks: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
-# Update a task (ADMIN, MANAGER)
-@app.put("/tasks/{task_id}", response_model=Task)
+# Update a task (ADMIN, MANAGER). background=true runs it, with its reassignments, as a job and answers 202 with the job
+@app.put("/tasks/{task_id}", response_model=Task, responses={202: {"model": JobResponse}})
 async def update_task(
     task_id: int,
     task_update: TaskUpdate,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    background: bool = False,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role not in {"admin", "manager"}:
         raise HTTPException(status_code=403, detail="Access forbidden: Admins and Managers only")
 
     try:
-        db_task = db.query(DBTask).filter(DBTask.task_id == task_id).first()
-        if not db_task:
-            raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
-
-        if task_update.name:
-            db_task.name = task_update.name
-        if task_update.description:
-            db_task.description = task_update.description
-        if task_update.due_date:
-            db_task.due_date = task_update.due_date
-
-
-        if task_update.employee_ids is not None:
-            db.query(EmployeeTask).filter(EmployeeTask.task_id == task_id).delete()
-            db.commit()
-
-            for employee_id in task_update.employee_ids:
-                employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id, DBEmployee.role == "member").first()
-                if not employee:
-                    raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
-                db_employee_task = EmployeeTask(task_id=task_id, employee_id=employee_id)
-                db.add(db_employee_task)
-
-        db.commit()
-        db.refresh(db_task)
-
-        employees = db.query(DBEmployee).join(EmployeeTask).filter(EmployeeTask.task_id == task_id).all()
-        return Task(
-            task_id=db_task.task_id,
-            name=db_task.name,
-            description=db_task.description,
-            due_date=db_task.due_date,
-            project_id=db_task.project_id,
-            task_status=db_task.status,
-            task_owner_id=db_task.task_owner_id,
-            task_owner_name=user.name,  
-            employee_ids=[employee.employee_id for employee in employees]
-        )
+        if background:
+            if not await db.scalar(select(DBTask.task_id).where(DBTask.task_id == task_id)):
+                raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
+            await check_employee_roles(db, member_ids=task_update.employee_ids)
+            payload = {"task_id": task_id, "task": task_update.model_dump(mode="json")}
+            return accepted(await submit(db, "task.update", payload, user))
+        return await apply_task_update(db, task_id, task_update, user.name)
 
     except HTTPException as e:
         raise e
@@ -721,25 +1098,79 @@ async def update_task(
         print(f"Unexpected error while updating task: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
+async def apply_task_update(db: AsyncSession, task_id: int, task_update: TaskUpdate, owner_name: str) -> Task:
+    db_task = await db.scalar(select(DBTask).where(DBTask.task_id == task_id))
+    if not db_task:
+        raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
+
+    if task_update.name:
+        db_task.name = task_update.name
+    if task_update.description:
+        db_task.description = task_update.description
+    if task_update.due_date:
+        db_task.due_date = task_update.due_date
+
+
+    added, removed = [], set()
+    if task_update.employee_ids is not None:
+        await check_employee_roles(db, member_ids=task_update.employee_ids)
+        added, removed = await replace_links(db, EmployeeTask, EmployeeTask.task_id, task_id, task_update.employee_ids)
+
+    await db.commit()
+    await db.refresh(db_task)
+    access_cache.grant(added, task_id=task_id)
+    access_cache.revoke(removed, task_id=task_id)
+    await response_cache.invalidate(*task_tags(task_id), *project_tasks_tags(db_task.project_id))
+
+    employees = (await db.scalars(select(DBEmployee).join(EmployeeTask).where(EmployeeTask.task_id == task_id))).all()
+    await event_bus.publish(task_event("task.updated", db_task, [employee.employee_id for employee in employees]))
+    return Task(
+        task_id=db_task.task_id,
+        name=db_task.name,
+        description=db_task.description,
+        due_date=db_task.due_date,
+        project_id=db_task.project_id,
+        task_status=db_task.status,
+        task_owner_id=db_task.task_owner_id,
+        task_owner_name=owner_name,  
+        employee_ids=[employee.employee_id for employee in employees]
+    )
+
+
+@job_handler("task.update")
+async def run_task_update(db: AsyncSession, job: JobContext):
+    owner_name = await db.scalar(select(DBEmployee.name).where(DBEmployee.employee_id == job.created_by))
+    task = await apply_task_update(db, job.payload["task_id"], TaskUpdate(**job.payload["task"]), owner_name)
+    return task.model_dump(mode="json")
+
 # Delete a task (ADMIN, MANAGER)
 @app.delete("/tasks/{task_id}", response_model=dict)
 async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role not in {"admin", "manager"}:
         raise HTTPException(status_code=403, detail="Access forbidden: Admins and Managers only")
 
     try:
-        db_task = db.query(DBTask).filter(DBTask.task_id == task_id).first()
+        db_task = (await db.execute(
+            select(DBTask.project_id, DBTask.status).where(DBTask.task_id == task_id).with_for_update()
+        )).first()
         if not db_task:
             raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
 
-        db.query(EmployeeTask).filter(EmployeeTask.task_id == task_id).delete()
+        assignees = (await db.scalars(select(EmployeeTask.employee_id).where(EmployeeTask.task_id == task_id))).all()
+        # The links go with the task (ON DELETE CASCADE)
+        await record_tombstones(db, EmployeeTask, EmployeeTask.task_id == task_id)
+        await adjust_task_counts(db, task_removed(db_task.project_id, db_task.status))
 
-        db.delete(db_task)
-        db.commit()
+        await delete_tracked(db, DBTask, DBTask.task_id == task_id)
+        await db.commit()
+        access_cache.revoke(assignees, task_id=task_id)
+        task_projects.delete(task_id)
+        await response_cache.invalidate(*task_tags(task_id), *project_tasks_tags(db_task.project_id))
+        await event_bus.publish(change_event("task.deleted", task_id=task_id, project_id=db_task.project_id))
 
         return {"message": f"Task with ID {task_id} successfully deleted"}
 
@@ -754,24 +1185,24 @@ async def delete_task(
 @app.get("/employees/{employee_id}/projects", response_model=EmployeeProjectsListResponse)
 async def get_projects_for_employee(
     employee_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
     if user.role != "admin" and user.role != "manager" and user.employee_id != employee_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
     try:
-        db_employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id).first()
+        db_employee = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == employee_id))
         if not db_employee:
             raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
 
-        assigned_projects = db.query(DBProject).join(EmployeeProject).filter(
+        assigned_projects = (await db.scalars(select(DBProject).join(EmployeeProject).where(
             EmployeeProject.employee_id == employee_id
-        ).all()
+        ))).all()
 
         project_list = []
         for project in assigned_projects:
-            project_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == project.project_owner_id).first()
+            project_owner = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == project.project_owner_id))
             if not project_owner:
                 raise HTTPException(status_code=404, detail=f"Owner for project {project.project_id} not found")
 
@@ -803,47 +1234,47 @@ async def get_projects_for_employee(
 async def get_tasks_for_employee(
     employee_id: int,
     project_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
 ):
+    return await list_employee_tasks(db, user, employee_id, project_id, page)
+
+
+# Get all tasks for a specific employee across projects
+@app.get("/employees/{employee_id}/tasks", response_model=EmployeeTasksListResponse)
+async def get_all_tasks_for_employee(
+    employee_id: int,
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    return await list_employee_tasks(db, user, employee_id, None, page)
+
+
+async def list_employee_tasks(db: AsyncSession, user: AuthenticatedUser, employee_id: int, project_id: Optional[int], page: Page):
     if user.role != "admin" and user.role != "manager" and user.employee_id != employee_id:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
     try:
-        db_employee = db.query(DBEmployee).filter(DBEmployee.employee_id == employee_id).first()
+        project_ids = None
+        if project_id is not None:
+            await require_project_access(db, user, project_id)
+        elif user.role != "admin" and user.employee_id != employee_id:
+            # Managers see another employee's tasks only in the projects they are assigned to
+            project_ids = (await access_cache.get(db, user.employee_id)).project_ids
+
+        db_employee = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == employee_id))
         if not db_employee:
             raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
 
-        assigned_tasks = db.query(DBTask).join(EmployeeTask).filter(
-            EmployeeTask.employee_id == employee_id, DBTask.project_id == project_id
-        ).all()
-
-        task_list = []
-        for task in assigned_tasks:
-            project = db.query(DBProject).filter(DBProject.project_id == task.project_id).first()
-            if not project:
-                raise HTTPException(status_code=404, detail=f"Project for task {task.task_id} not found")
-
-            task_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == task.task_owner_id).first()
-            if not task_owner:
-                raise HTTPException(status_code=404, detail=f"Owner for task {task.task_id} not found")
-
-            task_list.append(EmployeeTaskResponse(
-                task_id=task.task_id,
-                name=task.name,
-                description=task.description,
-                due_date=task.due_date,
-                status=task.status,
-                project_id=task.project_id,
-                project_name=project.name,
-                task_owner_id=task.task_owner_id,
-                task_owner_name=task_owner.name
-            ))
+        task_list = await get_employee_task_responses(db, employee_id, project_id, page, project_ids)
 
-        return EmployeeTasksListResponse(
-            tasks=task_list,
-            task_count=len(task_list)
-        )
+        return fast_json(EmployeeTasksListResponse, {
+            "tasks": task_list,
+            "task_count": await page.total(db, employee_tasks_query(employee_id, project_id, project_ids), DBTask.task_id, task_list),
+            "next_cursor": page.next_cursor(task_list, "task_id"),
+        })
 
     except HTTPException as e:
         raise e
@@ -854,29 +1285,35 @@ async def get_tasks_for_employee(
 @app.get("/tasks/{task_id}", response_model=TaskResponse)
 async def get_task_by_id(
     task_id: int,
-    db: Session = Depends(get_db),
-    user: DBEmployee = Depends(verify_jwt)  
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthenticatedUser = Depends(verify_jwt)  
 ):
 
+    await require_task_access(db, user, task_id)
+    cached = await response_cache.get(request, user)
+    if cached is not None:
+        return cached
+
     try:
 
-        task = db.query(DBTask).filter(DBTask.task_id == task_id).first()
+        task = await db.scalar(select(DBTask).where(DBTask.task_id == task_id))
 
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        project = db.query(DBProject).filter(DBProject.project_id == task.project_id).first()
+        project = await db.scalar(select(DBProject).where(DBProject.project_id == task.project_id))
         if not project:
             raise HTTPException(status_code=404, detail="Project not found for this task")
 
-        task_owner = db.query(DBEmployee).filter(DBEmployee.employee_id == task.task_owner_id).first()
+        task_owner = await db.scalar(select(DBEmployee).where(DBEmployee.employee_id == task.task_owner_id))
         if not task_owner:
             raise HTTPException(status_code=404, detail="Task owner not found")
 
-        members = db.query(DBEmployee).join(EmployeeTask).filter(EmployeeTask.task_id == task.task_id, DBEmployee.role == "member").all()
+        members = (await db.scalars(select(DBEmployee).join(EmployeeTask).where(EmployeeTask.task_id == task.task_id, DBEmployee.role == "member"))).all()
    
 
-        return TaskResponse(
+        return await response_cache.put(request, user, TaskResponse(
             task_id=task.task_id,
             name = task.name,
             description=task.description,
@@ -888,7 +1325,11 @@ async def get_task_by_id(
             project_name=project.name,
             #employee_names=[employee.name for employee in employees]
             members=[{"employee_id" : member.employee_id, "name" : member.name} for member in members],
-        )
+        ), [
+            *task_tags(task.task_id),
+            *project_tags(task.project_id),
+            *employee_tags(task.task_owner_id, *(member.employee_id for member in members)),
+        ])
 
     except HTTPException as e:
         raise e  
@@ -897,9 +1338,24 @@ async def get_task_by_id(
         raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
 
 
+# Status, progress and outcome of a background job (the employee who submitted it, or ADMIN)
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: AuthenticatedUser = Depends(verify_jwt)
+):
+    try:
+        job = await db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if user.role != "admin" and job.created_by != user.employee_id:
+            raise HTTPException(status_code=403, detail="Access forbidden")
 
+        return fast_json(JobResponse, job_response(job))
 
-
-
-
-
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred") from e
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def format_value(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self.values.items())
+        return self.header() + [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in values]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                # one slot per bucket, then sum and count
+                series = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(series)) for key, series in self.values.items()]
+
+        lines = self.header()
+        names = self.labels + ("le",)
+        for key, series in values:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{format_labels(names, key + (format_value(bound),))} {count}")
+            lines.append(f"{self.name}_bucket{format_labels(names, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route"))
+requests_total = Counter("http_requests_total", "Requests by route and status code", ("method", "route", "status"))
+requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being handled", ("method",))
+request_statements = Histogram("db_statements_per_request", "SQL statements issued per request", ("method", "route"), STATEMENT_BUCKETS)
+slow_queries = Counter("db_slow_queries_total", f"Statements slower than {SLOW_QUERY_MS:g} ms by route", ("route",))
+
+METRICS = [request_latency, requests_total, requests_in_flight, request_statements, slow_queries]
+
+# Functions returning extra gauge samples at scrape time: {name: (help, kind, [(labels dict, value)])}
+collectors: List[Callable[[], Dict[str, tuple]]] = []
+
+
+def register_collector(collector: Callable[[], Dict[str, tuple]]):
+    collectors.append(collector)
+
+
+# Turn {"primary": {"checkouts": 3, ...}} style stats into samples labelled by their key
+def stats_samples(prefix: str, label: str, stats: Dict[str, dict], counters: Tuple[str, ...] = ()) -> Dict[str, tuple]:
+    samples = {}
+    for key, values in stats.items():
+        for field, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            kind = "counter" if field in counters else "gauge"
+            name = f"{prefix}_{field}" if kind == "gauge" or field.endswith("_total") else f"{prefix}_{field}_total"
+            samples.setdefault(name, (f"{prefix.replace('_', ' ')} {field.replace('_', ' ')}", kind, []))[2].append(({label: key}, value))
+    return samples
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+
+    for collector in collectors:
+        try:
+            samples = collector()
+        except Exception as e:
+            print(f"Metrics collector {collector.__name__} failed: {e}")
+            continue
+        for name, (help, kind, values) in samples.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in values:
+                lines.append(f"{name}{format_labels(tuple(labels), tuple(labels.values()))} {format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# Per-request counters, reachable from SQLAlchemy events through a context variable
+class RequestStats:
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+# The matched path template keeps label cardinality bounded (/tasks/{task_id}, not /tasks/42)
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = stats.route
+            requests_in_flight.dec((method,))
+            request_latency.observe((method, route), time.perf_counter() - started)
+            requests_total.inc((method, route, str(status)))
+            request_statements.observe((method, route), stats.statements)
+            current_request.reset(token)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "-"
+        slow_queries.inc((route,))
+        print(f"Slow query ({elapsed_ms:.1f} ms) from {route}: {' '.join(statement.split())}")
+
+
+# A failed statement never reaches after_cursor_execute, so drop its start time here
+def handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+# Count and time every statement on the given (sync) engines
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
@@ -0,0 +1,340 @@
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy import event, inspect, select, func, MetaData, Table, Column, Integer, String, DateTime
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateColumn, CreateTable, AddConstraint
+from database import Base
+import models
+
+# Applied migrations are recorded here; kept out of Base.metadata on purpose
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255)),
+    Column("applied_at", DateTime),
+)
+
+
+def find_index(name: str):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"Index {name} is not declared on any model")
+
+
+# Build CREATE INDEX so that it does not block writes on large tables
+def online_index_ddl(conn: Connection, index) -> str:
+    ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+    if conn.dialect.name == "mysql":
+        return f"{ddl} ALGORITHM=INPLACE LOCK=NONE"
+    if conn.dialect.name == "postgresql":
+        return ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+    return ddl
+
+
+def create_indexes(conn: Connection, names):
+    inspector = inspect(conn)
+    existing = {}
+    for name in names:
+        index = find_index(name)
+        table = index.table.name
+        if table not in existing:
+            existing[table] = {i["name"] for i in inspector.get_indexes(table)}
+        if name in existing[table]:
+            continue
+
+        execute_online_ddl(conn, online_index_ddl(conn, index))
+
+
+def execute_online_ddl(conn: Connection, ddl: str):
+    if conn.dialect.name == "postgresql" and " CONCURRENTLY " in ddl:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn.commit()
+        isolation_level = conn.get_isolation_level()
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql(ddl)
+        conn.execution_options(isolation_level=isolation_level)
+    else:
+        conn.exec_driver_sql(ddl)
+
+
+def create_initial_schema(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+
+def create_performance_indexes(conn: Connection):
+    create_indexes(conn, [
+        "ix_projects_project_owner_id",
+        "ix_tasks_project_id",
+        "ix_tasks_task_owner_id",
+        "ix_employee_email_id",
+        "ix_employee_role_employee_id",
+        "ix_employee_project_employee_id_project_id",
+        "ix_employee_task_task_id_employee_id",
+    ])
+
+
+def create_project_task_counts(conn: Connection):
+    counts = models.ProjectTaskCount.__table__
+    counts.create(bind=conn, checkfirst=True)
+    create_indexes(conn, ["ix_tasks_project_id_status_due_date"])
+
+    tasks = models.Task.__table__
+    conn.execute(counts.delete())
+    conn.execute(counts.insert().from_select(
+        ["project_id", "status", "task_count"],
+        select(tasks.c.project_id, tasks.c.status, func.count())
+        .where(tasks.c.project_id.is_not(None), tasks.c.status.is_not(None))
+        .group_by(tasks.c.project_id, tasks.c.status)
+    ))
+
+
+# Full-text search over project and task names and descriptions, see search.py.
+# SQLite uses external-content FTS5 tables kept in sync by triggers; MySQL and PostgreSQL index the base tables.
+SEARCH_TABLES = {"projects": "project_id", "tasks": "task_id"}
+
+
+def sqlite_search_ddl(table: str, key: str) -> List[str]:
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, content='{table}', content_rowid='{key}', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.{key}, new.name, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.{key}, old.name, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF name, description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.{key}, old.name, old.description); "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.{key}, new.name, new.description); END",
+    ]
+
+
+def create_search_index(conn: Connection, online: bool = False):
+    dialect = conn.dialect.name
+    for table, key in SEARCH_TABLES.items():
+        if dialect == "sqlite":
+            for ddl in sqlite_search_ddl(table, key):
+                conn.exec_driver_sql(ddl)
+            # Index rows that existed before the triggers did
+            conn.exec_driver_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        elif dialect == "mysql":
+            if f"ix_{table}_search" not in {i["name"] for i in inspect(conn).get_indexes(table)}:
+                conn.exec_driver_sql(f"CREATE FULLTEXT INDEX ix_{table}_search ON {table} (name, description)")
+        elif dialect == "postgresql":
+            concurrently = " CONCURRENTLY" if online else ""
+            execute_online_ddl(conn, (
+                f"CREATE INDEX{concurrently} IF NOT EXISTS ix_{table}_search ON {table} "
+                f"USING gin (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))"
+            ))
+
+
+def drop_search_index(conn: Connection):
+    if conn.dialect.name == "sqlite":
+        for table in SEARCH_TABLES:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+def create_full_text_search(conn: Connection):
+    create_search_index(conn, online=True)
+
+
+# create_all/drop_all (fresh databases, benchmarks) manage the search index along with the tables
+event.listen(Base.metadata, "after_create", lambda target, conn, **kw: create_search_index(conn))
+event.listen(Base.metadata, "before_drop", lambda target, conn, **kw: drop_search_index(conn))
+
+
+
+# Change tracking for /sync, see changes.py. Entity tables are backfilled with distinct versions in key order
+# so the first sync of an existing database pages like any other; link rows share their parent's version.
+VERSIONED_TABLES = {"employee": "employee_id", "projects": "project_id", "tasks": "task_id"}
+VERSIONED_LINKS = {"employee_project": ("projects", "project_id"), "employee_task": ("tasks", "task_id")}
+
+
+def add_columns(conn: Connection, table: Table, names):
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(table.c[name]).compile(dialect=conn.dialect)}")
+
+
+def backfill_versions(conn: Connection):
+    counter = models.ChangeCounter.__table__
+    version = conn.execute(select(counter.c.version)).scalar() or 0
+
+    for name, key in VERSIONED_TABLES.items():
+        table = Base.metadata.tables[name]
+        conn.execute(table.update().where(table.c.version.is_(None)).values(version=table.c[key] + version))
+        version += conn.execute(select(func.max(table.c[key]))).scalar() or 0
+
+    for name, (parent_name, key) in VERSIONED_LINKS.items():
+        link, parent = Base.metadata.tables[name], Base.metadata.tables[parent_name]
+        conn.execute(link.update().where(link.c.version.is_(None)).values(
+            version=select(parent.c.version).where(parent.c[key] == link.c[key]).scalar_subquery()
+        ))
+
+    conn.execute(counter.update().values(version=version))
+
+
+def create_change_tracking(conn: Connection):
+    models.ChangeCounter.__table__.create(bind=conn, checkfirst=True)
+    models.Tombstone.__table__.create(bind=conn, checkfirst=True)
+    for name in [*VERSIONED_TABLES, *VERSIONED_LINKS]:
+        add_columns(conn, Base.metadata.tables[name], ["version", "updated_at"])
+    create_indexes(conn, [f"ix_{name}_version" for name in [*VERSIONED_TABLES, *VERSIONED_LINKS]])
+    backfill_versions(conn)
+
+
+# The counter is a single row, created along with its table
+event.listen(
+    models.ChangeCounter.__table__, "after_create",
+    lambda target, conn, **kw: conn.execute(target.insert().values(id=1, version=0))
+)
+
+# ON DELETE CASCADE on every foreign key, so deletes no longer load the dependent rows into the ORM.
+# MySQL and PostgreSQL swap the constraints in place; SQLite cannot alter a constraint and rebuilds the table.
+CASCADE_TABLES = ["tasks", "employee_task", "employee_project", "project_task_counts"]
+
+
+def missing_cascades(conn: Connection, table: Table):
+    existing = inspect(conn).get_foreign_keys(table.name)
+    for constraint in table.foreign_key_constraints:
+        for reflected in existing:
+            if reflected["constrained_columns"] == constraint.column_keys and (reflected.get("options") or {}).get("ondelete", "").upper() != "CASCADE":
+                yield constraint, reflected["name"]
+
+
+def rebuild_sqlite_table(conn: Connection, table: Table):
+    columns = ", ".join(column.name for column in table.columns)
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+    conn.exec_driver_sql(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {table.name}_new ", 1))
+    conn.exec_driver_sql(f"INSERT INTO {table.name}_new ({columns}) SELECT {columns} FROM {table.name}")
+    conn.exec_driver_sql(f"DROP TABLE {table.name}")
+    conn.exec_driver_sql(f"ALTER TABLE {table.name}_new RENAME TO {table.name}")
+    for index in table.indexes:
+        conn.exec_driver_sql(str(CreateIndex(index).compile(dialect=conn.dialect)))
+    # Dropping the table dropped its search triggers; the FTS rows themselves are keyed by the unchanged ids
+    if table.name in SEARCH_TABLES:
+        for ddl in sqlite_search_ddl(table.name, SEARCH_TABLES[table.name]):
+            conn.exec_driver_sql(ddl)
+
+
+def cascade_deletes(conn: Connection):
+    tables = [Base.metadata.tables[name] for name in CASCADE_TABLES]
+
+    if conn.dialect.name == "sqlite":
+        stale = [table for table in tables if any(missing_cascades(conn, table))]
+        if not stale:
+            return
+        # Foreign keys have to be off while tables are dropped and renamed, and the pragma is ignored inside a transaction
+        conn.commit()
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        try:
+            conn.exec_driver_sql("BEGIN")
+            for table in stale:
+                rebuild_sqlite_table(conn, table)
+            if conn.exec_driver_sql("PRAGMA foreign_key_check").first():
+                raise RuntimeError("Rows with dangling foreign keys found; fix them before migrating")
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+        return
+
+    for table in tables:
+        for constraint, name in list(missing_cascades(conn, table)):
+            drop = "DROP FOREIGN KEY" if conn.dialect.name == "mysql" else "DROP CONSTRAINT"
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} {drop} {name}")
+            conn.execute(AddConstraint(constraint))
+
+
+def create_jobs(conn: Connection):
+    models.Job.__table__.create(bind=conn, checkfirst=True)
+
+
+def create_auth_sessions(conn: Connection):
+    models.AuthSession.__table__.create(bind=conn, checkfirst=True)
+
+
+def create_open_changes(conn: Connection):
+    models.OpenChange.__table__.create(bind=conn, checkfirst=True)
+
+
+# Job tables created by migration 7 before the JSON columns became LONGTEXT on MySQL
+def widen_job_columns(conn: Connection):
+    if conn.dialect.name != "mysql":
+        return
+    columns = ", ".join(
+        f"MODIFY {CreateColumn(models.Job.__table__.c[name]).compile(dialect=conn.dialect)}"
+        for name in ["payload", "result", "error"]
+    )
+    conn.exec_driver_sql(f"ALTER TABLE jobs {columns}")
+
+
+# Ordered list of (version, name, upgrade function). Append new entries, never edit applied ones.
+MIGRATIONS = [
+    (1, "initial schema", create_initial_schema),
+    (2, "performance indexes", create_performance_indexes),
+    (3, "project task counts", create_project_task_counts),
+    (4, "full-text search", create_full_text_search),
+    (5, "change tracking", create_change_tracking),
+    (6, "cascading deletes", cascade_deletes),
+    (7, "background jobs", create_jobs),
+    (8, "refresh sessions", create_auth_sessions),
+    (9, "open change versions", create_open_changes),
+    (10, "long job payloads", widen_job_columns),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# 0 for an empty database, 1 for a database created before migrations existed
+def current_version(conn: Connection) -> int:
+    inspector = inspect(conn)
+    if inspector.has_table(schema_version.name):
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    return 1 if inspector.has_table(models.Employee.__tablename__) else 0
+
+
+def record_version(conn: Connection, version: int, name: str):
+    applied_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    conn.execute(schema_version.insert().values(version=version, name=name, applied_at=applied_at))
+
+
+def upgrade(conn: Connection, target: int = LATEST_VERSION):
+    version = current_version(conn)
+    if version == 0 and target < LATEST_VERSION:
+        raise RuntimeError(f"An empty database can only be created at the latest version ({LATEST_VERSION}), not {target}")
+    schema_version.create(bind=conn, checkfirst=True)
+    applied = []
+
+    if version == 0:
+        # A fresh database gets the current models in one go
+        create_initial_schema(conn)
+        for number, name, _ in MIGRATIONS:
+            record_version(conn, number, name)
+        conn.commit()
+        return [name for _, name, _ in MIGRATIONS]
+
+    if version == 1 and not conn.execute(select(schema_version.c.version)).first():
+        record_version(conn, 1, MIGRATIONS[0][1])
+        conn.commit()
+
+    for number, name, migrate in MIGRATIONS:
+        if version < number <= target:
+            migrate(conn)
+            record_version(conn, number, name)
+            conn.commit()
+            applied.append(name)
+
+    return applied
+
+
+def stamp(conn: Connection, target: int):
+    schema_version.create(bind=conn, checkfirst=True)
+    conn.execute(schema_version.delete())
+    for number, name, _ in MIGRATIONS:
+        if number <= target:
+            record_version(conn, number, name)
+    conn.commit()
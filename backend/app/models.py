@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Deleting a project, task or employee removes its tasks, links and counts in the database (ON DELETE CASCADE);
+# passive_deletes keeps the ORM from loading those rows first
+
 # Projects table
 class Project(Base):
     __tablename__ = "projects"
@@ -11,49 +15,67 @@ class Project(Base):
     description = Column(String(255))  
     start_date = Column(DateTime)
     end_date = Column(DateTime)
-    project_owner_id = Column(Integer) 
+    project_owner_id = Column(Integer, index=True)
     project_status = Column(String(255))
+    version = Column(Integer, index=True)
+    updated_at = Column(DateTime)
 
-    tasks = relationship("Task", back_populates="project", cascade="all, delete")
-    employees = relationship("EmployeeProject", back_populates="project", cascade="all, delete")
+    tasks = relationship("Task", back_populates="project", cascade="all, delete", passive_deletes=True)
+    employees = relationship("EmployeeProject", back_populates="project", cascade="all, delete", passive_deletes=True)
 
 
 # Tasks table
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_project_id_status_due_date", "project_id", "status", "due_date"),
+    )
     
     task_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255))
     description = Column(String(255))  
     due_date = Column(DateTime)
     status = Column(String(255))  #
-    project_id = Column(Integer, ForeignKey("projects.project_id"))
-    task_owner_id = Column(Integer) 
+    project_id = Column(Integer, ForeignKey("projects.project_id", ondelete="CASCADE"), index=True)
+    task_owner_id = Column(Integer, index=True)
+    version = Column(Integer, index=True)
+    updated_at = Column(DateTime)
     
     project = relationship("Project", back_populates="tasks")
-    employees = relationship("EmployeeTask", back_populates="task", cascade="all, delete") 
+    employees = relationship("EmployeeTask", back_populates="task", cascade="all, delete", passive_deletes=True) 
 
 
 # Employee table
 class Employee(Base):
     __tablename__ = "employee"
+    __table_args__ = (
+        Index("ix_employee_email_id", "email_id", unique=True),
+        Index("ix_employee_role_employee_id", "role", "employee_id"),
+    )
     
     employee_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255)) 
     email_id = Column(String(255))
     role = Column(String(255))  
     profile_image_url = Column(String(255), nullable=True)
+    version = Column(Integer, index=True)
+    updated_at = Column(DateTime)
 
-    tasks = relationship("EmployeeTask", back_populates="employee", cascade="all, delete")
-    projects = relationship("EmployeeProject", back_populates="employee", cascade="all, delete") 
+    tasks = relationship("EmployeeTask", back_populates="employee", cascade="all, delete", passive_deletes=True)
+    projects = relationship("EmployeeProject", back_populates="employee", cascade="all, delete", passive_deletes=True) 
 
 
 # Employee-Task relation table
 class EmployeeTask(Base):
     __tablename__ = "employee_task"
+    __table_args__ = (
+        Index("ix_employee_task_task_id_employee_id", "task_id", "employee_id"),
+    )
     
-    employee_id = Column(Integer, ForeignKey("employee.employee_id"), primary_key=True)
-    task_id = Column(Integer, ForeignKey("tasks.task_id"), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employee.employee_id", ondelete="CASCADE"), primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, index=True)
+    updated_at = Column(DateTime)
     
     employee = relationship("Employee", back_populates="tasks")
     task = relationship("Task", back_populates="employees")
@@ -61,9 +83,94 @@ class EmployeeTask(Base):
 # Employee-Project relation table
 class EmployeeProject(Base):
     __tablename__ = "employee_project"
+    __table_args__ = (
+        Index("ix_employee_project_employee_id_project_id", "employee_id", "project_id"),
+    )
 
-    project_id = Column(Integer, ForeignKey("projects.project_id"), primary_key=True)
-    employee_id = Column(Integer, ForeignKey("employee.employee_id"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.project_id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employee.employee_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, index=True)
+    updated_at = Column(DateTime)
 
     project = relationship("Project", back_populates="employees")
     employee = relationship("Employee", back_populates="projects")
+
+
+# Number of tasks per project and status, kept up to date by the task endpoints
+class ProjectTaskCount(Base):
+    __tablename__ = "project_task_counts"
+
+    project_id = Column(Integer, ForeignKey("projects.project_id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(255), primary_key=True)
+    task_count = Column(Integer, nullable=False, default=0)
+
+
+# Single-row counter handing out change versions, one per writing transaction (see changes.py)
+class ChangeCounter(Base):
+    __tablename__ = "change_counter"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# Versions handed out to transactions that have not committed yet (see changes.py)
+class OpenChange(Base):
+    __tablename__ = "open_changes"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    opened_at = Column(DateTime, nullable=False)
+
+
+# Keys of deleted rows, so /sync can tell clients what to drop
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+
+    tombstone_id = Column(Integer, primary_key=True, autoincrement=True)
+    version = Column(Integer, nullable=False, index=True)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    employee_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime)
+
+
+# MySQL TEXT stops at 64 KB, too small for a bulk import's items or per-item results
+JSONText = Text().with_variant(mysql.LONGTEXT(), "mysql")
+
+
+# Background jobs (see jobs.py). payload, result and error hold JSON.
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(64), nullable=False)
+    status = Column(String(32), nullable=False)
+    payload = Column(JSONText)
+    result = Column(JSONText, nullable=True)
+    error = Column(JSONText, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    created_by = Column(Integer, index=True)
+    created_at = Column(DateTime)
+    run_after = Column(DateTime)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+# Refresh-token sessions (see auth.py). The refresh cookie carries the session id and a secret;
+# only the secret's hash is stored, along with the previous one to catch a rotated token being replayed.
+class AuthSession(Base):
+    __tablename__ = "auth_sessions"
+
+    session_id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey("employee.employee_id", ondelete="CASCADE"), nullable=False, index=True)
+    refresh_hash = Column(String(64), nullable=False)
+    previous_hash = Column(String(64), nullable=True)
+    created_at = Column(DateTime)
+    rotated_at = Column(DateTime)
+    expires_at = Column(DateTime)
+    revoked_at = Column(DateTime, nullable=True)
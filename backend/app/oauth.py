@@ -0,0 +1,122 @@
+import asyncio
+import os
+import re
+from typing import Optional
+import httpx
+from fastapi import HTTPException
+from cache import TTLCache
+
+# Point GOOGLE_DISCOVERY_URL at a local stub server to run the login flow without Google
+GOOGLE_DISCOVERY_URL = os.getenv("GOOGLE_DISCOVERY_URL", "https://accounts.google.com/.well-known/openid-configuration")
+OAUTH_HTTP_TIMEOUT = float(os.getenv("OAUTH_HTTP_TIMEOUT", "10"))
+OAUTH_HTTP_RETRIES = int(os.getenv("OAUTH_HTTP_RETRIES", "2"))
+OAUTH_HTTP_MAX_CONNECTIONS = int(os.getenv("OAUTH_HTTP_MAX_CONNECTIONS", "100"))
+OAUTH_DISCOVERY_TTL = float(os.getenv("OAUTH_DISCOVERY_TTL", "3600"))
+
+# Used when the discovery document cannot be fetched
+DEFAULT_ENDPOINTS = {
+    "authorization_endpoint": "https://accounts.google.com/o/oauth2/v2/auth",
+    "token_endpoint": "https://oauth2.googleapis.com/token",
+    "userinfo_endpoint": "https://www.googleapis.com/oauth2/v3/userinfo",
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+discovery_cache = TTLCache(maxsize=1, ttl=OAUTH_DISCOVERY_TTL)
+_discovery_lock = asyncio.Lock()
+_client: Optional[httpx.AsyncClient] = None
+
+
+# One pooled client per worker so logins reuse keep-alive connections to Google
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OAUTH_HTTP_TIMEOUT),
+            limits=httpx.Limits(max_connections=OAUTH_HTTP_MAX_CONNECTIONS, max_keepalive_connections=20),
+            # Retries failed connection attempts only, so a POST is never sent twice
+            transport=httpx.AsyncHTTPTransport(retries=OAUTH_HTTP_RETRIES),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# GET with retries on timeouts and transient statuses; safe because GETs are idempotent
+async def get_with_retries(url: str, **kwargs) -> httpx.Response:
+    for attempt in range(OAUTH_HTTP_RETRIES + 1):
+        last_attempt = attempt == OAUTH_HTTP_RETRIES
+        try:
+            response = await get_http_client().get(url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+        await asyncio.sleep(0.2 * 2 ** attempt)
+
+
+def max_age(response: httpx.Response) -> Optional[float]:
+    match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+    return float(match.group(1)) if match else None
+
+
+async def google_endpoints() -> dict:
+    endpoints = discovery_cache.get(GOOGLE_DISCOVERY_URL)
+    if endpoints is not None:
+        return endpoints
+
+    async with _discovery_lock:
+        endpoints = discovery_cache.get(GOOGLE_DISCOVERY_URL)
+        if endpoints is not None:
+            return endpoints
+
+        try:
+            response = await get_with_retries(GOOGLE_DISCOVERY_URL)
+            response.raise_for_status()
+            endpoints = {**DEFAULT_ENDPOINTS, **response.json()}
+            discovery_cache.set(GOOGLE_DISCOVERY_URL, endpoints, ttl=max_age(response))
+        except (httpx.HTTPError, ValueError) as e:
+            # Fall back to the well-known endpoints for a minute instead of retrying on every login
+            print(f"Failed to fetch OAuth discovery document: {e}")
+            endpoints = DEFAULT_ENDPOINTS
+            discovery_cache.set(GOOGLE_DISCOVERY_URL, endpoints, ttl=60)
+
+    return endpoints
+
+
+async def exchange_code(code: str, client_id: str, client_secret: str, redirect_uri: str) -> dict:
+    endpoints = await google_endpoints()
+    try:
+        response = await get_http_client().post(endpoints["token_endpoint"], data={
+            "code": code,
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "redirect_uri": redirect_uri,
+            "grant_type": "authorization_code",
+        })
+    except httpx.HTTPError as e:
+        print(e)
+        raise HTTPException(status_code=502, detail="Failed to reach token endpoint") from e
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to fetch token")
+    return response.json()
+
+
+async def fetch_user_info(access_token: str) -> dict:
+    endpoints = await google_endpoints()
+    try:
+        response = await get_with_retries(endpoints["userinfo_endpoint"], headers={"Authorization": f"Bearer {access_token}"})
+    except httpx.HTTPError as e:
+        print(e)
+        raise HTTPException(status_code=502, detail="Failed to reach user info endpoint") from e
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to fetch user info")
+    return response.json()
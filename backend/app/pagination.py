@@ -0,0 +1,43 @@
+from fastapi import Query as QueryParam
+from sqlalchemy import func, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+MAX_PAGE_SIZE = 500
+
+
+# Keyset pagination on a primary key column: ?limit=<n>&cursor=<last seen id>
+# Omitting limit returns the full (filtered) list for existing clients.
+class Page:
+    def __init__(
+        self,
+        limit: Optional[int] = QueryParam(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[int] = QueryParam(None, ge=0),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    def apply(self, query: Select, key_column) -> Select:
+        if self.cursor is not None:
+            query = query.where(key_column > self.cursor)
+        query = query.order_by(key_column)
+        if self.limit is not None:
+            query = query.limit(self.limit)
+        return query
+
+    def next_cursor(self, items, key: str) -> Optional[int]:
+        if self.limit is None or len(items) < self.limit:
+            return None
+        last = items[-1]
+        return last[key] if isinstance(last, dict) else getattr(last, key)
+
+    # The full listing already holds every row; only pages need a separate count
+    async def total(self, db: AsyncSession, query: Select, key_column, items) -> int:
+        if self.limit is None and self.cursor is None:
+            return len(items)
+        return await count_rows(db, query, key_column)
+
+
+# Count the rows matched by a filtered query without loading them
+async def count_rows(db: AsyncSession, query: Select, key_column) -> int:
+    return await db.scalar(query.order_by(None).with_only_columns(func.count(key_column)))
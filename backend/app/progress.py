@@ -0,0 +1,97 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Task as DBTask, ProjectTaskCount
+
+COMPLETED_STATUS = "Completed"
+
+
+def upsert_counts(dialect: str):
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(ProjectTaskCount)
+        return statement.on_duplicate_key_update(task_count=ProjectTaskCount.task_count + statement.inserted.task_count)
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(ProjectTaskCount)
+    return statement.on_conflict_do_update(
+        index_elements=[ProjectTaskCount.project_id, ProjectTaskCount.status],
+        set_={"task_count": ProjectTaskCount.task_count + statement.excluded.task_count}
+    )
+
+
+# Apply (project_id, status) -> delta to project_task_counts in the caller's transaction
+async def adjust_task_counts(db: AsyncSession, deltas: Dict[Tuple[int, str], int]):
+    deltas = [
+        {"project_id": project_id, "status": status, "task_count": delta}
+        for (project_id, status), delta in deltas.items()
+        if delta and project_id is not None and status is not None
+    ]
+    if deltas:
+        await db.execute(upsert_counts(db.bind.dialect.name), deltas)
+
+
+def task_added(project_id: int, status: str, count: int = 1) -> Counter:
+    return Counter({(project_id, status): count})
+
+
+def task_removed(project_id: int, status: str) -> Counter:
+    return Counter({(project_id, status): -1})
+
+
+def status_changed(project_id: int, old_status: str, new_status: str) -> Counter:
+    if old_status == new_status:
+        return Counter()
+    deltas = Counter({(project_id, new_status): 1})
+    deltas[(project_id, old_status)] -= 1
+    return deltas
+
+
+# Status counts come from the summary table; overdue and next due depend on the current time,
+# so they are read from the (project_id, status, due_date) index in one grouped query
+async def get_project_progress(db: AsyncSession, project_ids: Iterable[int]) -> Dict[int, dict]:
+    project_ids = list(project_ids)
+    if not project_ids:
+        return {}
+
+    status_counts = defaultdict(dict)
+    for project_id, status, task_count in (await db.execute(
+        select(ProjectTaskCount.project_id, ProjectTaskCount.status, ProjectTaskCount.task_count)
+        .where(ProjectTaskCount.project_id.in_(project_ids), ProjectTaskCount.task_count > 0)
+    )).all():
+        status_counts[project_id][status] = task_count
+
+    now = datetime.now()
+    due = {
+        project_id: (overdue, next_due)
+        for project_id, overdue, next_due in (await db.execute(
+            select(
+                DBTask.project_id,
+                func.sum(case((DBTask.due_date < now, 1), else_=0)),
+                func.min(case((DBTask.due_date >= now, DBTask.due_date))),
+            )
+            .where(DBTask.project_id.in_(project_ids), DBTask.status != COMPLETED_STATUS)
+            .group_by(DBTask.project_id)
+        )).all()
+    }
+
+    progress = {}
+    for project_id in project_ids:
+        counts = status_counts.get(project_id, {})
+        task_count = sum(counts.values())
+        completed = counts.get(COMPLETED_STATUS, 0)
+        overdue, next_due = due.get(project_id, (0, None))
+        progress[project_id] = {
+            "task_count": task_count,
+            "status_counts": counts,
+            "completed_count": completed,
+            "completion_percentage": round(100 * completed / task_count, 1) if task_count else 0.0,
+            "overdue_count": overdue or 0,
+            "next_due_date": next_due,
+        }
+    return progress
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import select, Select
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List, Optional
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject
+from pagination import Page
+from progress import get_project_progress
+
+
+# Load the managers and members of the given projects in a single statement
+async def get_project_assignments(db: AsyncSession, project_ids: List[int]):
+    managers = defaultdict(list)
+    members = defaultdict(list)
+    if not project_ids:
+        return managers, members
+
+    rows = (await db.execute(
+        select(EmployeeProject.project_id, DBEmployee.employee_id, DBEmployee.name, DBEmployee.role)
+        .join(DBEmployee, DBEmployee.employee_id == EmployeeProject.employee_id)
+        .where(EmployeeProject.project_id.in_(project_ids), DBEmployee.role.in_(("manager", "member")))
+        .order_by(EmployeeProject.project_id, DBEmployee.employee_id)
+    )).all()
+
+    for project_id, employee_id, name, role in rows:
+        target = managers if role == "manager" else members
+        target[project_id].append({"employee_id": employee_id, "name": name})
+
+    return managers, members
+
+
+# Build ProjectResponse-shaped dicts for a project query in a constant number of statements.
+# The rows come straight from the database, so they are not validated again; see fast_json.py.
+async def get_project_responses(db: AsyncSession, projects: Select, page: Optional[Page] = None) -> List[dict]:
+    projects = projects.outerjoin(
+        DBEmployee, DBEmployee.employee_id == DBProject.project_owner_id
+    ).add_columns(DBEmployee.name)
+    if page is not None:
+        projects = page.apply(projects, DBProject.project_id)
+    rows = (await db.execute(projects)).all()
+
+    project_ids = [project.project_id for project, _ in rows]
+    managers, members = await get_project_assignments(db, project_ids)
+    progress = await get_project_progress(db, project_ids)
+
+    project_list = []
+    for project, owner_name in rows:
+        if owner_name is None:
+            raise HTTPException(status_code=404, detail=f"Project owner with ID {project.project_owner_id} not found")
+
+        project_list.append({
+            "project_name": project.name,
+            "description": project.description,
+            "start_date": project.start_date,
+            "end_date": project.end_date,
+            "project_id": project.project_id,
+            "project_owner_id": project.project_owner_id,
+            "project_owner_name": owner_name,
+            "project_status": project.project_status,
+            "managers": managers[project.project_id],
+            "members": members[project.project_id],
+            "progress": progress[project.project_id],
+        })
+
+    return project_list
+
+
+# Load the employees assigned to the given tasks in a single statement
+async def get_task_assignments(db: AsyncSession, task_ids: List[int]):
+    assignments = defaultdict(list)
+    if not task_ids:
+        return assignments
+
+    rows = (await db.execute(
+        select(EmployeeTask.task_id, DBEmployee.employee_id, DBEmployee.name)
+        .join(DBEmployee, DBEmployee.employee_id == EmployeeTask.employee_id)
+        .where(EmployeeTask.task_id.in_(task_ids))
+        .order_by(EmployeeTask.task_id, DBEmployee.employee_id)
+    )).all()
+
+    for task_id, employee_id, name in rows:
+        assignments[task_id].append({"employee_id": employee_id, "name": name})
+
+    return assignments
+
+
+# Build TaskResponse-shaped dicts for a task query in a constant number of statements
+async def get_task_responses(db: AsyncSession, tasks: Select, page: Optional[Page] = None) -> List[dict]:
+    tasks = tasks.outerjoin(
+        DBEmployee, DBEmployee.employee_id == DBTask.task_owner_id
+    ).add_columns(DBEmployee.name)
+    if page is not None:
+        tasks = page.apply(tasks, DBTask.task_id)
+    rows = (await db.execute(tasks)).all()
+
+    members = await get_task_assignments(db, [task.task_id for task, _ in rows])
+
+    task_list = []
+    for task, owner_name in rows:
+        if owner_name is None:
+            raise HTTPException(status_code=404, detail=f"Task owner with ID {task.task_owner_id} not found")
+
+        task_list.append({
+            "task_id": task.task_id,
+            "name": task.name,
+            "description": task.description,
+            "due_date": task.due_date,
+            "status": task.status,
+            "task_owner_id": task.task_owner_id,
+            "task_owner_name": owner_name,
+            "members": members[task.task_id],
+        })
+
+    return task_list
+
+
+# Tasks assigned to an employee, optionally limited to one project
+def employee_tasks_query(
+    employee_id: int, project_id: Optional[int] = None, project_ids: Optional[Iterable[int]] = None
+) -> Select:
+    tasks = select(DBTask).join(
+        EmployeeTask, EmployeeTask.task_id == DBTask.task_id
+    ).where(EmployeeTask.employee_id == employee_id)
+    if project_id is not None:
+        tasks = tasks.where(DBTask.project_id == project_id)
+    if project_ids is not None:
+        tasks = tasks.where(DBTask.project_id.in_(project_ids))
+    return tasks
+
+
+# Build EmployeeTaskResponse-shaped dicts with project and owner names in a single joined statement
+async def get_employee_task_responses(
+    db: AsyncSession, employee_id: int, project_id: Optional[int] = None, page: Optional[Page] = None,
+    project_ids: Optional[Iterable[int]] = None
+) -> List[dict]:
+    TaskOwner = aliased(DBEmployee)
+    tasks = employee_tasks_query(employee_id, project_id, project_ids).join(
+        DBProject, DBProject.project_id == DBTask.project_id
+    ).outerjoin(
+        TaskOwner, TaskOwner.employee_id == DBTask.task_owner_id
+    ).add_columns(DBProject.name, TaskOwner.name)
+    tasks = page.apply(tasks, DBTask.task_id) if page is not None else tasks.order_by(DBTask.task_id)
+    rows = (await db.execute(tasks)).all()
+
+    task_list = []
+    for task, project_name, owner_name in rows:
+        if owner_name is None:
+            raise HTTPException(status_code=404, detail=f"Task owner with ID {task.task_owner_id} not found")
+
+        task_list.append({
+            "task_id": task.task_id,
+            "name": task.name,
+            "description": task.description,
+            "due_date": task.due_date,
+            "status": task.status,
+            "project_id": task.project_id,
+            "project_name": project_name,
+            "task_owner_id": task.task_owner_id,
+            "task_owner_name": owner_name,
+        })
+
+    return task_list
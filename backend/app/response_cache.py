@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+from typing import Iterable, Optional, Tuple, Union
+from fastapi import Request, Response
+from pydantic import BaseModel
+from cache import TTLCache
+from schemas import AuthenticatedUser
+from fast_json import dumps
+
+# memory:// keeps entries in this process, redis://host:port/db shares them between workers.
+# An empty value turns the cache off.
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "memory://")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+
+# Entries live in a TTLCache; each tag remembers the keys stored under it
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.tags = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        return self.entries.get(key), self.generation
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int):
+        with self._lock:
+            # Something was invalidated while this response was being built
+            if generation != self.generation:
+                return
+            self.entries.set(key, value)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    self.entries.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self.entries.stats(), "tags": len(self.tags)}
+
+
+# Only uses GET/MGET/SET/INCRBY/SADD/SMEMBERS/EXPIRE/DEL so any Redis-protocol server will do
+class RedisBackend:
+    def __init__(self, url: str, ttl: float, prefix: str = "response-cache:"):
+        import redis.asyncio as redis
+
+        # RESP2 so that servers without HELLO support work too
+        self.client = redis.from_url(url, protocol=2)
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        value, generation = await self.client.mget(self.prefix + key, self.prefix + "generation")
+        return value, int(generation or 0)
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int):
+        if int(await self.client.get(self.prefix + "generation") or 0) != generation:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, value, ex=self.ttl)
+            for tag in tags:
+                pipe.sadd(self.prefix + "tag:" + tag, self.prefix + key)
+                pipe.expire(self.prefix + "tag:" + tag, self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, tags: Iterable[str]):
+        tag_keys = [self.prefix + "tag:" + tag for tag in tags]
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(self.prefix + "generation")
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            results = await pipe.execute()
+
+        keys = set(tag_keys)
+        for members in results[1:]:
+            keys.update(members)
+        await self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+def create_backend(url: str):
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, RESPONSE_CACHE_TTL)
+    raise RuntimeError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+# Serve a stored body, or a 304 when the client already holds this version
+def cached_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [value.strip() for value in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Read endpoint responses keyed by path, query string and the caller's role.
+# Entries are tagged with the rows they were built from so writes can drop exactly those.
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def key(self, request: Request, user: AuthenticatedUser) -> str:
+        query = "&".join(sorted(f"{name}={value}" for name, value in request.query_params.multi_items()))
+        return f"{request.url.path}?{query}|{user.role}"
+
+    async def get(self, request: Request, user: AuthenticatedUser) -> Optional[Response]:
+        if self.backend is None:
+            return None
+
+        try:
+            value, request.state.cache_generation = await self.backend.get(self.key(request, user))
+        except Exception as e:
+            print(f"Response cache read failed: {e}")
+            return None
+
+        if value is None:
+            return None
+        etag, body = value.split(b"\n", 1)
+        return cached_response(request, body, etag.decode())
+
+    async def put(self, request: Request, user: AuthenticatedUser, payload: Union[BaseModel, dict], tags: Iterable[str]) -> Response:
+        body = dumps(payload)
+        etag = etag_for(body)
+
+        generation = getattr(request.state, "cache_generation", None)
+        if self.backend is not None and generation is not None:
+            try:
+                await self.backend.set(self.key(request, user), etag.encode() + b"\n" + body, list(tags), generation)
+            except Exception as e:
+                print(f"Response cache write failed: {e}")
+
+        return cached_response(request, body, etag)
+
+    def stats(self) -> dict:
+        return self.backend.stats() if self.backend is not None else {"backend": None}
+
+    async def invalidate(self, *tags: str):
+        if self.backend is None or not tags:
+            return
+        try:
+            await self.backend.invalidate(tags)
+        except Exception as e:
+            print(f"Response cache invalidation failed: {e}")
+
+
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_URL))
+
+
+def project_tags(project_id: int) -> list:
+    return [f"project:{project_id}"]
+
+
+def project_tasks_tags(project_id: int) -> list:
+    return [f"project-tasks:{project_id}"]
+
+
+def task_tags(task_id: int) -> list:
+    return [f"task:{task_id}"]
+
+
+def employee_tags(*employee_ids: int) -> list:
+    return [f"employee:{employee_id}" for employee_id in dict.fromkeys(employee_ids)]
+
+
+EMPLOYEES_TAG = "employees"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class ProjectBase(BaseModel):
@@ -17,6 +17,18 @@ class EmployeeBriefResponse(BaseModel):
     name: str
 
 
+class AuthenticatedUser(BaseModel):
+    employee_id: int
+    name: str
+    email_id: str
+    role: str
+    profile_image_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class UpdateRoleRequest(BaseModel):
     new_role: str
     employee_id: int
@@ -28,6 +40,14 @@ class ProjectUpdate(ProjectBase):
     #project_owner_id: int
 
 
+class ProjectProgress(BaseModel):
+    task_count: int
+    status_counts: Dict[str, int]
+    completed_count: int
+    completion_percentage: float
+    overdue_count: int
+    next_due_date: Optional[datetime] = None
+
 class ProjectResponse(BaseModel):
     project_name: str
     description: Optional[str] = None
@@ -39,6 +59,7 @@ class ProjectResponse(BaseModel):
     project_status: str
     managers: List[EmployeeBriefResponse]
     members: List[EmployeeBriefResponse]
+    progress: Optional[ProjectProgress] = None
 
     class Config:
         orm_mode = True
@@ -70,6 +91,19 @@ class ProjectUpdateResponse(ProjectBase):
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
     project_count: int
+    next_cursor: Optional[int] = None
+
+class ProjectSummary(BaseModel):
+    project_id: int
+    project_name: str
+    project_status: str
+    end_date: datetime
+    progress: ProjectProgress
+
+class ProjectSummaryListResponse(BaseModel):
+    projects: List[ProjectSummary]
+    project_count: int
+    next_cursor: Optional[int] = None
 
 class TaskBase(BaseModel):
     name: str
@@ -107,6 +141,7 @@ class TaskResponse(BaseModel):
 class TaskListResponse(BaseModel):
     tasks: List[TaskResponse]
     task_count: int
+    next_cursor: Optional[int] = None
 
 class TaskUpdate(BaseModel):
     name: str
@@ -141,6 +176,7 @@ class ManagerResponse(BaseModel):
 class ManagerListResponse(BaseModel):
     managers: List[ManagerResponse]
     manager_count: int
+    next_cursor: Optional[int] = None
 
 class MemberResponse(BaseModel):
     employee_id: int
@@ -154,6 +190,7 @@ class MemberResponse(BaseModel):
 class MemberListResponse(BaseModel):
     members: List[MemberResponse]
     member_count: int
+    next_cursor: Optional[int] = None
 
 class EmployeeResponse(BaseModel):
     employee_id: int
@@ -166,6 +203,7 @@ class EmployeeResponse(BaseModel):
 class EmployeeListResponse(BaseModel):
     employees: List[EmployeeResponse]
     employee_count: int
+    next_cursor: Optional[int] = None
  
 class EmployeeProjectResponse(BaseModel):
     project_id: int
@@ -201,9 +239,123 @@ class EmployeeTaskResponse(BaseModel):
 class EmployeeTasksListResponse(BaseModel):
     tasks: List[EmployeeTaskResponse]
     task_count: int
+    next_cursor: Optional[int] = None
 
 class UpdateTaskStatusRequest(BaseModel):
     task_id: int
     new_status: str
 
+class BulkTaskCreate(TaskCreate):
+    project_id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str
+    task_id: Optional[int] = None
+    detail: Optional[str] = None
 
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+class SearchResult(BaseModel):
+    kind: str
+    id: int
+    project_id: int
+    name: str
+    description: Optional[str] = None
+    status: Optional[str] = None
+    score: float
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int] = None
+
+
+class ProjectChange(BaseModel):
+    project_id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    project_owner_id: Optional[int] = None
+    project_status: Optional[str] = None
+    version: int
+    updated_at: Optional[datetime] = None
+
+class TaskChange(BaseModel):
+    task_id: int
+    project_id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    due_date: Optional[datetime] = None
+    status: Optional[str] = None
+    task_owner_id: Optional[int] = None
+    version: int
+    updated_at: Optional[datetime] = None
+
+class EmployeeChange(BaseModel):
+    employee_id: int
+    name: Optional[str] = None
+    role: Optional[str] = None
+    version: int
+    updated_at: Optional[datetime] = None
+
+class EmployeeProjectChange(BaseModel):
+    project_id: int
+    employee_id: int
+    version: int
+
+class EmployeeTaskChange(BaseModel):
+    task_id: int
+    employee_id: int
+    version: int
+
+class DeletedRow(BaseModel):
+    table: str
+    row_id: int
+    employee_id: Optional[int] = None
+    version: int
+
+class SyncResponse(BaseModel):
+    projects: List[ProjectChange]
+    tasks: List[TaskChange]
+    employees: List[EmployeeChange]
+    employee_projects: List[EmployeeProjectChange]
+    employee_tasks: List[EmployeeTaskChange]
+    deleted: List[DeletedRow]
+    next_token: str
+    has_more: bool
+    # The token was unusable (another database, or the user's role changed): this is a full snapshot, drop local data first
+    reset: bool
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
+
+class JobResponse(BaseModel):
+    job_id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    progress_done: int
+    progress_total: Optional[int] = None
+    result: Any = None
+    error: Any = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,105 @@
+import re
+from typing import List, Optional
+from sqlalchemy import select, literal, literal_column, func, union_all, table, column
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Project as DBProject, Task as DBTask, EmployeeTask, EmployeeProject
+from schemas import AuthenticatedUser
+
+SEARCH_KINDS = ("project", "task")
+MAX_SEARCH_TERMS = 8
+
+# The FTS5 tables created in migrations.py, addressed through their hidden table-named column
+projects_fts = table("projects_fts", column("rowid"))
+tasks_fts = table("tasks_fts", column("rowid"))
+
+
+# Every word of the query must match, the words as prefixes: "des rev" finds "Design review"
+def search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())[:MAX_SEARCH_TERMS]
+
+
+def text_match(dialect: str, model, fts, terms: List[str]):
+    if dialect == "sqlite":
+        name = literal_column(fts.name)
+        # bm25 is lower for better matches; names weigh twice as much as descriptions
+        return name.match(" ".join(f'"{term}"*' for term in terms)), -func.bm25(name, 2.0, 1.0), fts
+
+    if dialect == "mysql":
+        relevance = mysql_match(model.name, model.description, against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+        return relevance, relevance, None
+
+    # Same expression as the GIN index in migrations.py so PostgreSQL can use it
+    vector = literal_column(
+        f"to_tsvector('simple', coalesce({model.__tablename__}.name, '') || ' ' || coalesce({model.__tablename__}.description, ''))"
+    )
+    query = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+    return vector.op("@@")(query), func.ts_rank(vector, query), None
+
+
+def scoped(statement, fts, key_column):
+    if fts is None:
+        return statement
+    return statement.join(fts, fts.c.rowid == key_column)
+
+
+# Ranked matches across projects and tasks the user may see:
+# admins everything, managers their projects and the tasks in them, members their projects and assigned tasks
+async def search(
+    db: AsyncSession,
+    user: AuthenticatedUser,
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[dict]:
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    dialect = db.bind.dialect.name
+    own_projects = select(EmployeeProject.project_id).where(EmployeeProject.employee_id == user.employee_id)
+    parts = []
+
+    if kind in (None, "project"):
+        condition, score, fts = text_match(dialect, DBProject, projects_fts, terms)
+        projects = scoped(select(
+            literal("project").label("kind"),
+            DBProject.project_id.label("id"),
+            DBProject.project_id.label("project_id"),
+            DBProject.name.label("name"),
+            DBProject.description.label("description"),
+            DBProject.project_status.label("status"),
+            score.label("score"),
+        ), fts, DBProject.project_id).where(condition)
+        if user.role != "admin":
+            projects = projects.where(DBProject.project_id.in_(own_projects))
+        parts.append(projects)
+
+    if kind in (None, "task"):
+        condition, score, fts = text_match(dialect, DBTask, tasks_fts, terms)
+        tasks = scoped(select(
+            literal("task").label("kind"),
+            DBTask.task_id.label("id"),
+            DBTask.project_id.label("project_id"),
+            DBTask.name.label("name"),
+            DBTask.description.label("description"),
+            DBTask.status.label("status"),
+            score.label("score"),
+        ), fts, DBTask.task_id).where(condition)
+        if user.role == "member":
+            tasks = tasks.where(DBTask.task_id.in_(
+                select(EmployeeTask.task_id).where(EmployeeTask.employee_id == user.employee_id)
+            ))
+        elif user.role != "admin":
+            tasks = tasks.where(DBTask.project_id.in_(own_projects))
+        parts.append(tasks)
+
+    matches = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    rows = (await db.execute(
+        select(matches)
+        .order_by(matches.c.score.desc(), matches.c.kind, matches.c.id)
+        .limit(limit)
+        .offset(offset)
+    )).mappings()
+    return [{**row, "score": float(row["score"])} for row in rows]
@@ -0,0 +1,139 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeProject, EmployeeTask, Tombstone
+from changes import committed_version
+from schemas import AuthenticatedUser
+
+DEFAULT_SYNC_LIMIT = 1000
+MAX_SYNC_LIMIT = 10000
+
+PROJECT_COLUMNS = (
+    DBProject.project_id, DBProject.name, DBProject.description, DBProject.start_date, DBProject.end_date,
+    DBProject.project_owner_id, DBProject.project_status, DBProject.version, DBProject.updated_at,
+)
+TASK_COLUMNS = (
+    DBTask.task_id, DBTask.project_id, DBTask.name, DBTask.description, DBTask.due_date,
+    DBTask.status, DBTask.task_owner_id, DBTask.version, DBTask.updated_at,
+)
+EMPLOYEE_COLUMNS = (DBEmployee.employee_id, DBEmployee.name, DBEmployee.role, DBEmployee.version, DBEmployee.updated_at)
+
+VERSIONED = (DBProject, DBTask, DBEmployee, EmployeeProject, EmployeeTask, Tombstone)
+
+
+def in_window(model, since: int, until: int):
+    return and_(model.version > since, model.version <= until)
+
+
+# The page ends after the limit-th changed row, but never inside a version:
+# a transaction's changes are always delivered together
+async def page_end(db: AsyncSession, since: int, head: int, limit: int) -> Tuple[int, bool]:
+    versions = []
+    for model in VERSIONED:
+        versions += (await db.scalars(
+            select(model.version).where(in_window(model, since, head)).order_by(model.version).limit(limit + 1)
+        )).all()
+
+    if len(versions) <= limit:
+        return head, False
+    until = sorted(versions)[limit - 1]
+    return until, until < head
+
+
+async def rows(db: AsyncSession, statement):
+    return [dict(row) for row in (await db.execute(statement)).mappings()]
+
+
+# Tokens carry the role the client's data was scoped for, so a role change starts a fresh snapshot
+def make_token(version: int, role: str) -> str:
+    return f"{version}:{role}"
+
+
+def parse_token(token: Optional[str]) -> Tuple[int, Optional[str]]:
+    if not token:
+        return 0, None
+    version, _, role = token.partition(":")
+    if not version.isdigit() or not role:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return int(version), role
+
+
+# Rows changed after the token that the user may see, scoped like /search and /events:
+# admins everything, managers their projects with all their tasks, members their projects and assigned tasks.
+# Projects and tasks the user was assigned to in this window come in whole, whatever their version.
+async def sync_changes(db: AsyncSession, user: AuthenticatedUser, token: Optional[str], limit: int) -> dict:
+    since, role = parse_token(token)
+    head = await db.scalar(committed_version()) or 0
+
+    # A token from another database, or one scoped for a different role, starts over
+    reset = bool(token) and (since > head or role != user.role)
+    if reset:
+        since = 0
+
+    until, has_more = await page_end(db, since, head, limit)
+
+    projects = select(*PROJECT_COLUMNS)
+    tasks = select(*TASK_COLUMNS)
+    employees = select(*EMPLOYEE_COLUMNS).where(in_window(DBEmployee, since, until))
+    employee_projects = select(EmployeeProject.project_id, EmployeeProject.employee_id, EmployeeProject.version)
+    employee_tasks = select(EmployeeTask.task_id, EmployeeTask.employee_id, EmployeeTask.version)
+
+    if user.role == "admin":
+        projects = projects.where(in_window(DBProject, since, until))
+        tasks = tasks.where(in_window(DBTask, since, until))
+        employee_projects = employee_projects.where(in_window(EmployeeProject, since, until))
+        employee_tasks = employee_tasks.where(in_window(EmployeeTask, since, until))
+    else:
+        own_projects = select(EmployeeProject.project_id).where(EmployeeProject.employee_id == user.employee_id)
+        joined_projects = own_projects.where(in_window(EmployeeProject, since, until))
+        projects = projects.where(
+            DBProject.project_id.in_(own_projects),
+            or_(in_window(DBProject, since, until), DBProject.project_id.in_(joined_projects)),
+        )
+
+        if user.role == "member":
+            own_tasks = select(EmployeeTask.task_id).where(EmployeeTask.employee_id == user.employee_id)
+            joined_tasks = own_tasks.where(in_window(EmployeeTask, since, until))
+            tasks = tasks.where(
+                DBTask.task_id.in_(own_tasks),
+                or_(in_window(DBTask, since, until), DBTask.task_id.in_(joined_tasks)),
+            )
+            employees = employees.where(DBEmployee.employee_id == user.employee_id)
+            employee_projects = employee_projects.where(
+                EmployeeProject.employee_id == user.employee_id, in_window(EmployeeProject, since, until)
+            )
+            employee_tasks = employee_tasks.where(
+                EmployeeTask.employee_id == user.employee_id, in_window(EmployeeTask, since, until)
+            )
+        else:
+            tasks = tasks.where(
+                DBTask.project_id.in_(own_projects),
+                or_(in_window(DBTask, since, until), DBTask.project_id.in_(joined_projects)),
+            )
+            employee_projects = employee_projects.where(
+                EmployeeProject.project_id.in_(own_projects),
+                or_(in_window(EmployeeProject, since, until), EmployeeProject.project_id.in_(joined_projects)),
+            )
+            employee_tasks = employee_tasks.join(DBTask, DBTask.task_id == EmployeeTask.task_id).where(
+                DBTask.project_id.in_(own_projects),
+                or_(in_window(EmployeeTask, since, until), DBTask.project_id.in_(joined_projects)),
+            )
+
+    # Tombstones only carry keys; clients drop whatever they hold under them and ignore the rest.
+    # A snapshot has nothing to drop.
+    deleted = [] if not since else await rows(db, select(
+        Tombstone.table_name.label("table"), Tombstone.row_id, Tombstone.employee_id, Tombstone.version
+    ).where(in_window(Tombstone, since, until)).order_by(Tombstone.version))
+
+    return {
+        "projects": await rows(db, projects.order_by(DBProject.version)),
+        "tasks": await rows(db, tasks.order_by(DBTask.version)),
+        "employees": await rows(db, employees.order_by(DBEmployee.version)),
+        "employee_projects": await rows(db, employee_projects.order_by(EmployeeProject.version)),
+        "employee_tasks": await rows(db, employee_tasks.order_by(EmployeeTask.version)),
+        "deleted": deleted,
+        "next_token": make_token(until, user.role),
+        "has_more": has_more,
+        "reset": reset,
+    }
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'task_tracker_benchmark.db')}")
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from sqlalchemy import event, insert, select, func
+from database import AsyncSessionLocal, engine, async_engine, Base
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject, ProjectTaskCount, Tombstone
+from migrations import schema_version, upgrade, create_project_task_counts, backfill_versions
+from main import remove_project
+
+TASK_COUNTS = [1000, 10000, 50000]
+MEMBERS = 20
+ASSIGNEES_PER_TASK = 2
+INSERT_BATCH = 10000
+
+
+# One admin, one project holding every task, each task assigned to a few of the project's members
+def seed(task_count):
+    Base.metadata.drop_all(bind=engine)
+    schema_version.drop(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        upgrade(conn)
+
+    with engine.begin() as conn:
+        conn.execute(insert(DBEmployee), [{"name": "Admin", "email_id": "admin@example.com", "role": "admin"}] + [
+            {"name": f"Member {i}", "email_id": f"member{i}@example.com", "role": "member"} for i in range(MEMBERS)
+        ])
+        admin_id, *member_ids = conn.execute(select(DBEmployee.employee_id).order_by(DBEmployee.employee_id)).scalars().all()
+
+        conn.execute(insert(DBProject), [{
+            "name": "Big project",
+            "description": "Benchmark project",
+            "start_date": datetime(2024, 1, 1),
+            "end_date": datetime(2024, 12, 31),
+            "project_owner_id": admin_id,
+            "project_status": "In Progress",
+        }])
+        project_id = conn.execute(select(DBProject.project_id)).scalar_one()
+        conn.execute(insert(EmployeeProject), [{"project_id": project_id, "employee_id": e} for e in member_ids])
+
+        for start in range(0, task_count, INSERT_BATCH):
+            conn.execute(insert(DBTask), [
+                {"name": f"Task {i}", "description": "Benchmark task", "due_date": datetime(2024, 6, 1),
+                 "status": "Not Started", "project_id": project_id, "task_owner_id": admin_id}
+                for i in range(start, min(start + INSERT_BATCH, task_count))
+            ])
+        task_ids = conn.execute(select(DBTask.task_id)).scalars().all()
+        for start in range(0, len(task_ids), INSERT_BATCH):
+            conn.execute(insert(EmployeeTask), [
+                {"task_id": task_id, "employee_id": member_ids[(task_id + j) % MEMBERS]}
+                for task_id in task_ids[start:start + INSERT_BATCH]
+                for j in range(ASSIGNEES_PER_TASK)
+            ])
+
+        create_project_task_counts(conn)
+        backfill_versions(conn)
+
+    return project_id
+
+
+async def delete(project_id):
+    async with AsyncSessionLocal() as db:
+        result = await remove_project(db, project_id)
+    await async_engine.dispose()
+    return result
+
+
+def remaining(project_id):
+    with engine.connect() as conn:
+        return {
+            name: conn.execute(select(func.count()).select_from(model).where(criteria)).scalar()
+            for name, model, criteria in [
+                ("tasks", DBTask, DBTask.project_id == project_id),
+                ("employee_task", EmployeeTask, EmployeeTask.task_id.is_not(None)),
+                ("employee_project", EmployeeProject, EmployeeProject.project_id == project_id),
+                ("project_task_counts", ProjectTaskCount, ProjectTaskCount.project_id == project_id),
+            ]
+        }, conn.execute(select(func.count()).select_from(Tombstone)).scalar()
+
+
+def run(task_count):
+    project_id = seed(task_count)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    asyncio.run(delete(project_id))
+    elapsed = time.perf_counter() - started
+    event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    rows, tombstones = remaining(project_id)
+    assert not any(rows.values()), f"Rows left behind: {rows}"
+    expected = 1 + task_count + MEMBERS + task_count * ASSIGNEES_PER_TASK
+    assert tombstones == expected, f"{tombstones} tombstones, expected {expected}"
+    return len(statements), elapsed
+
+
+if __name__ == "__main__":
+    counts = set()
+    for task_count in TASK_COUNTS:
+        statement_count, elapsed = run(task_count)
+        counts.add(statement_count)
+        print(f"{task_count:>6} tasks: {statement_count} statements, {elapsed * 1000:.1f} ms")
+
+    assert len(counts) == 1, f"Statement count grows with task count: {sorted(counts)}"
+    print("Statement count is constant.")
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from dotenv import load_dotenv
+from jose import jwt
+
+load_dotenv()
+
+
+def mint_token(employee_id):
+    payload = {
+        "employee_id": employee_id,
+        "exp": (datetime.now(timezone.utc) + timedelta(hours=1)).timestamp(),
+    }
+    return jwt.encode(payload, os.getenv("JWT_SECRET"), algorithm="HS256")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def worker(client, paths, latencies, statuses, remaining):
+    while True:
+        try:
+            index = remaining.pop()
+        except IndexError:
+            return
+        path = paths[index % len(paths)]
+        started = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run(url, employee_id, paths, concurrency, total):
+    latencies, statuses = [], {}
+    remaining = list(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, cookies={"access_token": mint_token(employee_id)}, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client, paths, latencies, statuses, remaining) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{total} requests, concurrency {concurrency}, {elapsed:.2f} s")
+    print(f"throughput: {total / elapsed:.1f} req/s")
+    print(f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}, "
+          f"p50 {percentile(latencies, 50) * 1000:.1f}, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f}, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f}")
+    print(f"status codes: {statuses}")
+
+
+# Fire concurrent GET requests at a running backend, e.g. to compare commits:
+#   python benchmarks/load_test.py --url http://localhost:8000 --employee-id 1 --path /projects --path /employees
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent throughput test for the backend API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--employee-id", type=int, required=True, help="employee to mint the access_token cookie for")
+    parser.add_argument("--path", action="append", dest="paths", help="GET path to request, may be repeated")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.employee_id, args.paths or ["/projects"], args.concurrency, args.requests))
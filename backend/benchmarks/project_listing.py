@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'task_tracker_benchmark.db')}")
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from sqlalchemy import event, select
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine, Base
+from models import Project as DBProject, Employee as DBEmployee, EmployeeProject
+from queries import get_project_responses
+
+PROJECT_COUNTS = [10, 100, 1000, 4000]
+MANAGERS_PER_PROJECT = 2
+MEMBERS_PER_PROJECT = 5
+
+
+def seed(db, project_count):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    admin = DBEmployee(name="Admin", email_id="admin@example.com", role="admin")
+    db.add(admin)
+    db.flush()
+
+    managers = [DBEmployee(name=f"Manager {i}", email_id=f"manager{i}@example.com", role="manager") for i in range(20)]
+    members = [DBEmployee(name=f"Member {i}", email_id=f"member{i}@example.com", role="member") for i in range(100)]
+    db.add_all(managers + members)
+    db.flush()
+
+    for i in range(project_count):
+        project = DBProject(
+            name=f"Project {i}",
+            description="Benchmark project",
+            start_date=datetime(2024, 1, 1),
+            end_date=datetime(2024, 12, 31),
+            project_owner_id=admin.employee_id,
+            project_status="In Progress",
+        )
+        db.add(project)
+        db.flush()
+        assigned = [managers[(i + j) % len(managers)] for j in range(MANAGERS_PER_PROJECT)]
+        assigned += [members[(i + j) % len(members)] for j in range(MEMBERS_PER_PROJECT)]
+        db.add_all([EmployeeProject(project_id=project.project_id, employee_id=e.employee_id) for e in assigned])
+
+    db.commit()
+
+
+async def list_projects():
+    async with AsyncSessionLocal() as db:
+        projects = await get_project_responses(db, select(DBProject).order_by(DBProject.project_id))
+    await async_engine.dispose()
+    return projects
+
+
+def run(project_count):
+    db = SessionLocal()
+    try:
+        seed(db, project_count)
+    finally:
+        db.close()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    projects = asyncio.run(list_projects())
+    elapsed = time.perf_counter() - started
+    event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert len(projects) == project_count
+    assert all(len(p["managers"]) == MANAGERS_PER_PROJECT and len(p["members"]) == MEMBERS_PER_PROJECT for p in projects)
+    return len(statements), elapsed
+
+
+if __name__ == "__main__":
+    counts = set()
+    for project_count in PROJECT_COUNTS:
+        statement_count, elapsed = run(project_count)
+        counts.add(statement_count)
+        print(f"{project_count:>6} projects: {statement_count} statements, {elapsed * 1000:.1f} ms")
+
+    assert len(counts) == 1, f"Statement count grows with project count: {sorted(counts)}"
+    print("Statement count is constant.")
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'task_tracker_query_plans.db')}")
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from datetime import datetime
+from sqlalchemy import select, text, func, case
+from database import engine, Base
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject, ProjectTaskCount
+
+# The lookups issued by the hot endpoints; each must be answered through an index
+HOT_QUERIES = {
+    "login by email": select(DBEmployee).where(DBEmployee.email_id == "someone@example.com"),
+    "employees by role": select(DBEmployee).where(DBEmployee.role == "manager").order_by(DBEmployee.employee_id).limit(50),
+    "tasks of a project": select(DBTask).where(DBTask.project_id == 1).order_by(DBTask.task_id).limit(50),
+    "tasks owned by an employee": select(DBTask).where(DBTask.task_owner_id == 1),
+    "projects owned by an employee": select(DBProject).where(DBProject.project_owner_id == 1),
+    "assignments of a project": select(EmployeeProject.employee_id).where(EmployeeProject.project_id.in_([1, 2, 3])),
+    "projects of an employee": select(DBProject).join(EmployeeProject).where(EmployeeProject.employee_id == 1),
+    "assignees of a task": select(EmployeeTask.employee_id).where(EmployeeTask.task_id.in_([1, 2, 3])),
+    "tasks of an employee": select(DBTask).join(EmployeeTask).where(EmployeeTask.employee_id == 1, DBTask.project_id == 1),
+    "task counts of projects": select(ProjectTaskCount).where(ProjectTaskCount.project_id.in_([1, 2, 3])),
+    "due dates of open tasks": select(
+        DBTask.project_id, func.min(case((DBTask.due_date >= datetime(2024, 1, 1), DBTask.due_date)))
+    ).where(DBTask.project_id.in_([1, 2, 3]), DBTask.status != "Completed").group_by(DBTask.project_id),
+}
+
+
+def full_scans(connection, statement):
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    return [step for step in plan if step.startswith("SCAN") and "INDEX" not in step], plan
+
+
+if __name__ == "__main__":
+    if engine.dialect.name != "sqlite":
+        sys.exit("query_plans.py inspects SQLite plans; point DATABASE_URL at a SQLite file")
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    failures = []
+    with engine.connect() as connection:
+        for name, statement in HOT_QUERIES.items():
+            scans, plan = full_scans(connection, statement)
+            print(f"{'FULL SCAN' if scans else 'ok':>9}  {name}: {' | '.join(plan)}")
+            if scans:
+                failures.append(name)
+
+    assert not failures, f"Full table scans in: {', '.join(failures)}"
+    print("No full table scans on hot queries.")
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'task_tracker_benchmark.db')}")
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from schemas import ProjectListResponse, ProjectResponse
+from fast_json import fast_json
+
+PROJECT_COUNTS = [100, 1000, 10000]
+ROUNDS = 5
+
+
+# The dicts get_project_responses builds from database rows
+def project_rows(count):
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "project_name": f"Project {i}",
+            "description": "Benchmark project",
+            "start_date": start,
+            "end_date": start + timedelta(days=i % 365),
+            "project_id": i,
+            "project_owner_id": 1,
+            "project_owner_name": "Admin",
+            "project_status": "In Progress",
+            "managers": [{"employee_id": 2 + j, "name": f"Manager {j}"} for j in range(2)],
+            "members": [{"employee_id": 10 + j, "name": f"Member {j}"} for j in range(5)],
+            "progress": {
+                "task_count": 10,
+                "status_counts": {"Not Started": 4, "In Progress": 3, "Completed": 3},
+                "completed_count": 3,
+                "completion_percentage": 30.0,
+                "overdue_count": 1,
+                "next_due_date": start + timedelta(days=30),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+# Previous path: a model per row, then FastAPI validates the result against response_model and encodes it
+def validated(rows, field) -> bytes:
+    content = ProjectListResponse(
+        projects=[ProjectResponse(**row) for row in rows],
+        project_count=len(rows),
+        next_cursor=None,
+    )
+    content = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(content).body
+
+
+def fast(rows) -> bytes:
+    return fast_json(ProjectListResponse, {"projects": rows, "project_count": len(rows), "next_cursor": None}).body
+
+
+def best_of(fn, *args):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        body = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+if __name__ == "__main__":
+    field = create_model_field(name="Response_get_projects", type_=ProjectListResponse, mode="serialization")
+    for project_count in PROJECT_COUNTS:
+        rows = project_rows(project_count)
+        slow_seconds, slow_body = best_of(validated, rows, field)
+        fast_seconds, fast_body = best_of(fast, rows)
+
+        assert json.loads(slow_body) == json.loads(fast_body), "fast path output differs from the validated path"
+        print(
+            f"{project_count:>6} projects: validated {slow_seconds * 1000:8.1f} ms, "
+            f"fast {fast_seconds * 1000:7.1f} ms, {slow_seconds / fast_seconds:5.1f}x"
+        )
@@ -0,0 +1,531 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'task_tracker_suite.db')}")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import httpx
+from sqlalchemy import insert, select, func
+from database import engine, Base
+from models import Project as DBProject, Task as DBTask, Employee as DBEmployee, EmployeeTask, EmployeeProject, ChangeCounter
+from migrations import schema_version, upgrade, create_project_task_counts, backfill_versions
+from load_test import mint_token, percentile
+
+SCALES = {
+    "small": {"employees": 1000, "projects": 200, "tasks": 10000},
+    "medium": {"employees": 5000, "projects": 1000, "tasks": 100000},
+    "large": {"employees": 10000, "projects": 5000, "tasks": 500000},
+}
+ADMIN_SHARE = 0.02
+MANAGER_SHARE = 0.10
+MANAGERS_PER_PROJECT = 2
+MEMBERS_PER_PROJECT = 8
+MAX_ASSIGNEES = 3
+STATUSES = ["Not Started", "In Progress", "Completed"]
+PROJECT_STATUSES = ["Not Started", "In Progress", "Completed"]
+INSERT_BATCH = 10000
+# Words for project and task names, so that /search has something to rank
+VERBS = ["Design", "Review", "Deploy", "Migrate", "Refactor", "Document", "Test", "Plan", "Audit", "Optimize"]
+NOUNS = ["billing", "onboarding", "dashboard", "payments", "search", "reports", "invoices", "analytics", "checkout", "profile",
+         "notifications", "permissions", "exports", "imports", "settings", "calendar", "messaging", "inventory", "shipping", "pricing"]
+SEARCH_QUERIES = ["design", "rev", "billing", "pay", "migrate dash", "test inv", "audit perm", "ship"]
+
+# Employees per role the runner signs in as
+SAMPLE_SIZE = 200
+BULK_ITEMS = 50
+PAGE_SIZE = 100
+EXPORT_REQUESTS = 3
+# How many versions behind the latest the /sync scenario starts, like a client reconnecting after a while
+SYNC_BEHIND = 1000
+
+ALL_ROLES = {"admin": 1, "manager": 3, "member": 6}
+STAFF = {"admin": 1, "manager": 3}
+ADMIN = {"admin": 1}
+MANAGER = {"manager": 1}
+
+
+def insert_batches(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+
+
+# Deterministic dataset: the same scale and seed always produce the same rows
+def seed(employees, projects, tasks, rng_seed=0):
+    rng = random.Random(rng_seed)
+    now = datetime(2025, 1, 1)
+    started = time.perf_counter()
+
+    Base.metadata.drop_all(bind=engine)
+    schema_version.drop(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        upgrade(conn)
+
+    with engine.begin() as conn:
+        admins = max(2, int(employees * ADMIN_SHARE))
+        managers = max(MANAGERS_PER_PROJECT, int(employees * MANAGER_SHARE))
+        roles = ["admin"] * admins + ["manager"] * managers + ["member"] * (employees - admins - managers)
+        insert_batches(conn, DBEmployee.__table__, (
+            {"name": f"{role.title()} {i}", "email_id": f"{role}{i}@example.com", "role": role}
+            for i, role in enumerate(roles)
+        ))
+
+        by_role = defaultdict(list)
+        for employee_id, role in conn.execute(select(DBEmployee.employee_id, DBEmployee.role).order_by(DBEmployee.employee_id)):
+            by_role[role].append(employee_id)
+
+        insert_batches(conn, DBProject.__table__, (
+            {
+                "name": f"{rng.choice(NOUNS).title()} {rng.choice(NOUNS)} {i}",
+                "description": f"{rng.choice(VERBS)} the {rng.choice(NOUNS)} and {rng.choice(NOUNS)} services",
+                "start_date": now - timedelta(days=rng.randrange(365)),
+                "end_date": now + timedelta(days=rng.randrange(365)),
+                "project_owner_id": rng.choice(by_role["admin"]),
+                "project_status": rng.choice(PROJECT_STATUSES),
+            }
+            for i in range(projects)
+        ))
+        project_ids = conn.execute(select(DBProject.project_id).order_by(DBProject.project_id)).scalars().all()
+
+        project_members = {}
+        links = []
+        for project_id in project_ids:
+            assigned = rng.sample(by_role["manager"], MANAGERS_PER_PROJECT)
+            project_members[project_id] = rng.sample(by_role["member"], min(MEMBERS_PER_PROJECT, len(by_role["member"])))
+            links += [{"project_id": project_id, "employee_id": e} for e in assigned + project_members[project_id]]
+        insert_batches(conn, EmployeeProject.__table__, links)
+
+        insert_batches(conn, DBTask.__table__, (
+            {
+                "name": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {i}",
+                "description": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} for the {rng.choice(NOUNS)} team",
+                "due_date": now + timedelta(days=rng.randrange(-180, 180)),
+                "status": rng.choice(STATUSES),
+                "project_id": rng.choice(project_ids),
+                "task_owner_id": rng.choice(by_role["manager"]),
+            }
+            for i in range(tasks)
+        ))
+        insert_batches(conn, EmployeeTask.__table__, (
+            {"task_id": task_id, "employee_id": employee_id}
+            for task_id, project_id in conn.execute(select(DBTask.task_id, DBTask.project_id).order_by(DBTask.task_id))
+            for employee_id in rng.sample(project_members[project_id], rng.randint(1, min(MAX_ASSIGNEES, len(project_members[project_id]))))
+        ))
+
+        create_project_task_counts(conn)
+        backfill_versions(conn)
+
+    print(f"Seeded {employees} employees, {projects} projects and {tasks} tasks in {time.perf_counter() - started:.1f} s")
+
+
+def dataset_size() -> dict:
+    with engine.connect() as conn:
+        return {
+            name: conn.execute(select(func.count()).select_from(model)).scalar()
+            for name, model in [("employees", DBEmployee), ("projects", DBProject), ("tasks", DBTask), ("employee_tasks", EmployeeTask)]
+        }
+
+
+# Ids the scenarios pick from, plus the rows that the write scenarios create and later delete
+class Fixtures:
+    def __init__(self, rng):
+        self.rng = rng
+        with engine.connect() as conn:
+            by_role = defaultdict(list)
+            for employee_id, role in conn.execute(select(DBEmployee.employee_id, DBEmployee.role)):
+                by_role[role].append(employee_id)
+            self.admins = by_role["admin"]
+            self.employees = {role: rng.sample(ids, min(SAMPLE_SIZE, len(ids))) for role, ids in by_role.items()}
+            sampled = {e for ids in self.employees.values() for e in ids}
+
+            self.project_ids = conn.execute(select(DBProject.project_id)).scalars().all()
+            self.projects_of = defaultdict(list)
+            for employee_id, project_id in conn.execute(
+                select(EmployeeProject.employee_id, EmployeeProject.project_id).where(EmployeeProject.employee_id.in_(sampled))
+            ):
+                self.projects_of[employee_id].append(project_id)
+
+            self.members_of = defaultdict(list)
+            for project_id, employee_id in conn.execute(
+                select(EmployeeProject.project_id, EmployeeProject.employee_id)
+                .join(DBEmployee, DBEmployee.employee_id == EmployeeProject.employee_id)
+                .where(DBEmployee.role == "member")
+            ):
+                self.members_of[project_id].append(employee_id)
+
+            self.tasks_of = defaultdict(list)
+            for employee_id, task_id in conn.execute(
+                select(EmployeeTask.employee_id, EmployeeTask.task_id).where(EmployeeTask.employee_id.in_(self.employees.get("member", [])))
+            ):
+                self.tasks_of[employee_id].append(task_id)
+            self.task_ids = [task_id for ids in self.tasks_of.values() for task_id in ids]
+            # One task per project, for managers who may only open the tasks of their own projects
+            self.project_task = dict(conn.execute(select(DBTask.project_id, func.min(DBTask.task_id)).group_by(DBTask.project_id)).all())
+            self.sync_from = max(0, (conn.execute(select(ChangeCounter.version)).scalar() or 0) - SYNC_BEHIND)
+
+        # Members without tasks and managers without projects cannot exercise their endpoints
+        self.employees["member"] = [e for e in self.employees.get("member", []) if self.tasks_of[e] and self.projects_of[e]]
+        self.employees["manager"] = [
+            e for e in self.employees.get("manager", [])
+            if any(project_id in self.project_task and self.members_of[project_id] for project_id in self.projects_of[e])
+        ]
+        self.created_projects = []
+        self.created_tasks = []
+        self.turns = defaultdict(int)
+
+    # Walk the created rows in turn so concurrent writes do not race on the same row
+    def next_created(self, rows):
+        self.turns[id(rows)] += 1
+        return rows[self.turns[id(rows)] % len(rows)]
+
+    def project_for(self, employee_id, role):
+        if role == "admin":
+            return self.rng.choice(self.project_ids)
+        return self.rng.choice(self.projects_of[employee_id])
+
+    def task_for(self, employee_id, role):
+        if role == "member":
+            return self.rng.choice(self.tasks_of[employee_id])
+        if role == "manager":
+            return self.project_task[self.rng.choice([p for p in self.projects_of[employee_id] if p in self.project_task])]
+        return self.rng.choice(self.task_ids)
+
+    def new_task(self, project_id, index=0):
+        members = self.members_of[project_id]
+        return {
+            "name": f"Benchmark task {index}",
+            "description": "Created by the benchmark suite",
+            "due_date": (datetime(2025, 6, 1) + timedelta(days=self.rng.randrange(90))).isoformat(),
+            "employee_ids": self.rng.sample(members, min(2, len(members))),
+        }
+
+
+def new_project(f, employee_id, role):
+    managers = f.rng.sample(f.employees["manager"], min(MANAGERS_PER_PROJECT, len(f.employees["manager"])))
+    members = f.rng.sample(f.employees["member"], min(MEMBERS_PER_PROJECT, len(f.employees["member"])))
+    return {
+        "project_name": f"Benchmark project {f.rng.randrange(10 ** 9)}",
+        "description": "Created by the benchmark suite",
+        "start_date": "2025-01-01T00:00:00",
+        "end_date": "2025-12-31T00:00:00",
+        "manager_ids": managers,
+        "employee_ids": members,
+    }
+
+
+def remember_project(f, response):
+    f.created_projects.append(response.json()["project_id"])
+
+
+def remember_task(f, response):
+    body = response.json()
+    f.created_tasks.append((body["task_id"], body["project_id"]))
+
+
+def create_task(f, employee_id, role):
+    project_id = f.project_for(employee_id, role)
+    return f"/tasks/{project_id}", f.new_task(project_id)
+
+
+def update_task(f, employee_id, role):
+    task_id, project_id = f.next_created(f.created_tasks)
+    return f"/tasks/{task_id}", f.new_task(project_id)
+
+
+def bulk_tasks(f, employee_id, role):
+    project_id = f.project_for(employee_id, role)
+    return "/tasks/bulk", [{**f.new_task(project_id, i), "project_id": project_id} for i in range(BULK_ITEMS)]
+
+
+def bulk_status(f, employee_id, role):
+    task_ids = f.tasks_of[employee_id] if role == "member" else f.rng.sample(f.task_ids, min(BULK_ITEMS, len(f.task_ids)))
+    return "/tasks/bulk-status", [{"task_id": task_id, "new_status": f.rng.choice(STATUSES)} for task_id in task_ids[:BULK_ITEMS]]
+
+
+def change_role(f, employee_id, role):
+    # Re-granting admin to another admin goes through the whole handler without removing any assignments
+    return "/change-role", {"employee_id": f.rng.choice([e for e in f.admins if e != employee_id]), "new_role": "admin"}
+
+
+def own_id(f, employee_id, role):
+    return employee_id if role == "member" else f.rng.choice(f.employees["member"])
+
+
+def employee_project_tasks(f, employee_id, role):
+    if role == "manager":
+        project_id = f.rng.choice([p for p in f.projects_of[employee_id] if f.members_of[p]])
+        return f"/projects/{project_id}/employees/{f.rng.choice(f.members_of[project_id])}/tasks", None
+    member_id = own_id(f, employee_id, role)
+    return f"/projects/{f.rng.choice(f.projects_of[member_id])}/employees/{member_id}/tasks", None
+
+
+# What a dashboard loads on open, as one /batch call
+def dashboard_batch(f, employee_id, role):
+    project_ids = f.projects_of[employee_id][:5] if role != "admin" else f.rng.sample(f.project_ids, min(5, len(f.project_ids)))
+    requests = [{"path": "/get-userdetails"}, {"path": f"/employees/{own_id(f, employee_id, role)}/projects"}]
+    for project_id in project_ids:
+        requests.append({"path": f"/projects/{project_id}"})
+        if role != "member":
+            requests.append({"path": f"/projects/tasks/{project_id}?limit={PAGE_SIZE}"})
+    return "/batch", {"requests": requests}
+
+
+# (name, method, route template, role mix, request builder -> (path, json body), response hook, request count override)
+SCENARIOS = [
+    ("user details", "GET", "/get-userdetails", ALL_ROLES, lambda f, e, r: ("/get-userdetails", None), None, None),
+    ("pool metrics", "GET", "/metrics/pool", ADMIN, lambda f, e, r: ("/metrics/pool", None), None, None),
+    ("response cache metrics", "GET", "/metrics/response-cache", ADMIN, lambda f, e, r: ("/metrics/response-cache", None), None, None),
+    ("auth cache metrics", "GET", "/metrics/auth-cache", ADMIN, lambda f, e, r: ("/metrics/auth-cache", None), None, None),
+    ("list projects", "GET", "/projects", ADMIN, lambda f, e, r: (f"/projects?limit={PAGE_SIZE}", None), None, None),
+    ("list all projects", "GET", "/projects", ADMIN, lambda f, e, r: ("/projects", None), None, EXPORT_REQUESTS),
+    ("project summary", "GET", "/projects/summary", ALL_ROLES, lambda f, e, r: (f"/projects/summary?limit={PAGE_SIZE}", None), None, None),
+    ("project by id", "GET", "/projects/{project_id}", ALL_ROLES, lambda f, e, r: (f"/projects/{f.project_for(e, r)}", None), None, None),
+    ("export projects", "GET", "/export/{table}", ADMIN, lambda f, e, r: ("/export/projects?format=ndjson", None), None, EXPORT_REQUESTS),
+    ("export tasks", "GET", "/export/{table}", ADMIN, lambda f, e, r: ("/export/tasks?format=csv", None), None, EXPORT_REQUESTS),
+    ("list managers", "GET", "/managers", ADMIN, lambda f, e, r: (f"/managers?limit={PAGE_SIZE}", None), None, None),
+    ("list members", "GET", "/members", ADMIN, lambda f, e, r: (f"/members?limit={PAGE_SIZE}", None), None, None),
+    ("list employees", "GET", "/employees", STAFF, lambda f, e, r: (f"/employees?limit={PAGE_SIZE}", None), None, None),
+    ("project tasks", "GET", "/projects/tasks/{project_id}", STAFF, lambda f, e, r: (f"/projects/tasks/{f.project_for(e, r)}?limit={PAGE_SIZE}", None), None, None),
+    ("employee projects", "GET", "/employees/{employee_id}/projects", ALL_ROLES, lambda f, e, r: (f"/employees/{own_id(f, e, r)}/projects", None), None, None),
+    ("employee tasks", "GET", "/employees/{employee_id}/tasks", ALL_ROLES, lambda f, e, r: (f"/employees/{own_id(f, e, r)}/tasks?limit={PAGE_SIZE}", None), None, None),
+    ("employee project tasks", "GET", "/projects/{project_id}/employees/{employee_id}/tasks", ALL_ROLES, employee_project_tasks, None, None),
+    ("search", "GET", "/search", ALL_ROLES, lambda f, e, r: (f"/search?q={f.rng.choice(SEARCH_QUERIES)}&limit=20", None), None, None),
+    ("sync", "GET", "/sync", ALL_ROLES, lambda f, e, r: (f"/sync?since={f.sync_from}:{r}&limit={PAGE_SIZE}", None), None, None),
+    ("dashboard batch", "POST", "/batch", ALL_ROLES, dashboard_batch, None, None),
+    ("task by id", "GET", "/tasks/{task_id}", ALL_ROLES, lambda f, e, r: (f"/tasks/{f.task_for(e, r)}", None), None, None),
+    ("create project", "POST", "/projects", ADMIN, lambda f, e, r: ("/projects", new_project(f, e, r)), remember_project, None),
+    ("update project", "PUT", "/projects/{project_id}", ADMIN,
+        lambda f, e, r: (f"/projects/{f.next_created(f.created_projects)}", new_project(f, e, r)), None, None),
+    ("complete project", "POST", "/projects/mark-complete", MANAGER,
+        lambda f, e, r: ("/projects/mark-complete", {"project_id": f.next_created(f.created_projects), "project_status": "Completed"}), None, None),
+    ("create task", "POST", "/tasks/{project_id}", STAFF, create_task, remember_task, None),
+    ("update task", "PUT", "/tasks/{task_id}", STAFF, update_task, None, None),
+    ("update task status", "PUT", "/tasks/update-status", ALL_ROLES,
+        lambda f, e, r: ("/tasks/update-status", {"task_id": f.task_for(e, r), "new_status": f.rng.choice(STATUSES)}), None, None),
+    ("bulk create tasks", "POST", "/tasks/bulk", STAFF, bulk_tasks, None, None),
+    ("bulk task status", "PUT", "/tasks/bulk-status", ALL_ROLES, bulk_status, None, None),
+    ("change role", "PUT", "/change-role", ADMIN, change_role, None, None),
+    ("logout", "POST", "/logout", ALL_ROLES, lambda f, e, r: ("/logout", None), None, None),
+    ("delete task", "DELETE", "/tasks/{task_id}", STAFF, lambda f, e, r: (f"/tasks/{f.created_tasks.pop()[0]}", None), None, None),
+    ("delete project", "DELETE", "/projects/{project_id}", ADMIN, lambda f, e, r: (f"/projects/{f.created_projects.pop()}", None), None, None),
+]
+
+
+METRIC_LINE = re.compile(r'^db_statements_per_request_(sum|count)\{method="([^"]*)",route="([^"]*)"\} (\S+)$')
+
+
+# Statement totals per (method, route) from the backend's /metrics endpoint, or None if it has none
+async def statement_totals(client, metrics_token):
+    headers = {"Authorization": f"Bearer {metrics_token}"} if metrics_token else {}
+    response = await client.get("/metrics", headers=headers)
+    if response.status_code != 200:
+        return None
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for line in response.text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, method, route, value = match.groups()
+            totals[(method, route)][0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+async def run_scenario(client, fixtures, scenario, total, concurrency, metrics_token):
+    name, method, route, roles, build, on_response, override = scenario
+    total = override or total
+    rng = fixtures.rng
+    weights = {role: weight for role, weight in roles.items() if fixtures.employees.get(role)}
+    requests = []
+    for _ in range(total):
+        role = rng.choices(list(weights), list(weights.values()))[0]
+        employee_id = rng.choice(fixtures.employees[role])
+        path, body = build(fixtures, employee_id, role)
+        requests.append((employee_id, path, body))
+
+    latencies, statuses = [], defaultdict(int)
+    before = await statement_totals(client, metrics_token)
+
+    async def worker():
+        while requests:
+            employee_id, path, body = requests.pop()
+            headers = {"Cookie": f"access_token={mint_token(employee_id)}"}
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            if method == "GET":
+                await response.aread()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if on_response and response.status_code == 200:
+                on_response(fixtures, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - started
+
+    after = await statement_totals(client, metrics_token)
+    queries = None
+    if before is not None and after is not None:
+        statements = after[(method, route)][0] - before[(method, route)][0]
+        count = after[(method, route)][1] - before[(method, route)][1]
+        queries = round(statements / count, 2) if count else None
+
+    result = {
+        "name": name,
+        "method": method,
+        "route": route,
+        "roles": roles,
+        "requests": total,
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "status_codes": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": round(total / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+        "queries_per_request": queries,
+    }
+    print(
+        f"{name:<24} {total:>5} req {result['throughput_rps']:>8.1f} req/s  "
+        f"p50 {result['latency_ms']['p50']:>8.2f}  p95 {result['latency_ms']['p95']:>8.2f}  p99 {result['latency_ms']['p99']:>8.2f} ms  "
+        f"queries {queries if queries is not None else '-':>5}  errors {result['errors']}"
+    )
+    return result
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(url, total, concurrency, rng_seed, only, metrics_token):
+    fixtures = Fixtures(random.Random(rng_seed))
+    scenarios = [s for s in SCENARIOS if not only or s[0] in only]
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=300, limits=httpx.Limits(max_connections=concurrency))
+        async with client:
+            results = [await run_scenario(client, fixtures, s, total, concurrency, metrics_token) for s in scenarios]
+    else:
+        # In-process run: the app and the client share one event loop, so use --url against uvicorn for absolute numbers
+        from main import app, lifespan
+        async with lifespan(app):
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=300)
+            async with client:
+                results = [await run_scenario(client, fixtures, s, total, concurrency, metrics_token) for s in scenarios]
+
+    return results
+
+
+# Flag scenarios whose p95 grew by more than threshold percent or that issue more queries
+def compare(baseline_path, candidate_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {s["name"]: s for s in json.load(f)["scenarios"]}
+    with open(candidate_path) as f:
+        candidate = json.load(f)["scenarios"]
+
+    regressions = 0
+    print(f"{'scenario':<24} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'queries':>11}")
+    for scenario in candidate:
+        old = baseline.get(scenario["name"])
+        if old is None:
+            continue
+        cells = []
+        for key in ("p50", "p95", "p99"):
+            before, after = old["latency_ms"][key], scenario["latency_ms"][key]
+            change = (after - before) / before * 100 if before else 0.0
+            cells.append(f"{before:>7.1f}>{after:<7.1f}{change:+.0f}%")
+        p95_before, p95_after = old["latency_ms"]["p95"], scenario["latency_ms"]["p95"]
+        queries_before, queries_after = old["queries_per_request"], scenario["queries_per_request"]
+        regressed = (p95_before and (p95_after - p95_before) / p95_before * 100 > threshold) or (
+            queries_before is not None and queries_after is not None and queries_after > queries_before
+        )
+        regressions += bool(regressed)
+        print(f"{scenario['name']:<24} {' '.join(cells)} {queries_before!s:>5}>{queries_after!s:<5}{'  REGRESSION' if regressed else ''}")
+
+    print(f"{regressions} regression(s) over {threshold:g}% p95 or in queries per request")
+    return regressions
+
+
+# python benchmarks/suite.py seed --scale large
+# python benchmarks/suite.py run --output results/$(git rev-parse --short HEAD).json
+# python benchmarks/suite.py compare results/old.json results/new.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a benchmark database and drive every API endpoint against it")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="drop and re-create the DATABASE_URL database with generated data")
+    run_parser = commands.add_parser("run", help="drive every endpoint and write the results as JSON")
+    for command in (seed_parser, run_parser):
+        command.add_argument("--scale", choices=SCALES, default="small")
+        command.add_argument("--employees", type=int)
+        command.add_argument("--projects", type=int)
+        command.add_argument("--tasks", type=int)
+        command.add_argument("--seed", type=int, default=0, help="random seed for the data and the request mix")
+    run_parser.add_argument("--reseed", action="store_true", help="seed before running so results start from the same data")
+    run_parser.add_argument("--url", help="running backend sharing DATABASE_URL and JWT_SECRET; default runs the app in-process")
+    run_parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=10)
+    run_parser.add_argument("--scenario", action="append", dest="scenarios", help="only run the named scenario, may be repeated")
+    run_parser.add_argument("--metrics-token", default=os.getenv("METRICS_TOKEN"))
+    run_parser.add_argument("--output", help="JSON results file")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 growth in percent")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        sys.exit(1 if compare(args.baseline, args.candidate, args.threshold) else 0)
+
+    scale = {key: getattr(args, key) or value for key, value in SCALES[args.scale].items()}
+    if args.command == "seed" or args.reseed:
+        seed(scale["employees"], scale["projects"], scale["tasks"], args.seed)
+    if args.command == "seed":
+        sys.exit(0)
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    dataset = dataset_size()
+    scenarios = asyncio.run(run(args.url, args.requests, args.concurrency, args.seed, args.scenarios, args.metrics_token))
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at,
+        "database": engine.dialect.name,
+        "target": args.url or "in-process",
+        "python": platform.python_version(),
+        "dataset": dataset,
+        "settings": {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed},
+        "scenarios": scenarios,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,34 @@
+import argparse
+import sys
+import os
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+    from database import engine
+    from migrations import MIGRATIONS, LATEST_VERSION, current_version, upgrade, stamp
+
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="show the current and latest schema version")
+    upgrade_parser = subparsers.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=LATEST_VERSION, help="target version")
+    stamp_parser = subparsers.add_parser("stamp", help="mark the database as being at a version without running anything")
+    stamp_parser.add_argument("version", type=int)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        if args.command == "status":
+            version = current_version(conn)
+            for number, name, _ in MIGRATIONS:
+                print(f"{'applied' if number <= version else 'pending':>8}  {number}  {name}")
+            print(f"Current version {version}, latest {LATEST_VERSION}")
+        elif args.command == "upgrade":
+            try:
+                applied = upgrade(conn, args.to)
+            except RuntimeError as e:
+                sys.exit(str(e))
+            print(f"Applied: {', '.join(applied)}" if applied else "Nothing to apply")
+        elif args.command == "stamp":
+            stamp(conn, args.version)
+            print(f"Stamped version {args.version}")
@@ -0,0 +1,65 @@
+import argparse
+import secrets
+from urllib.parse import urlencode, parse_qs
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import RedirectResponse
+
+# Minimal stand-in for Google's OAuth endpoints, for local login testing:
+#   python oauth_stub.py --port 9000
+#   GOOGLE_DISCOVERY_URL=http://localhost:9000/.well-known/openid-configuration
+# /authorize signs in as --email straight away and redirects back with a code.
+
+app = FastAPI()
+codes = {}
+tokens = {}
+
+
+@app.get("/.well-known/openid-configuration")
+async def discovery():
+    return {
+        "issuer": app.state.base_url,
+        "authorization_endpoint": f"{app.state.base_url}/authorize",
+        "token_endpoint": f"{app.state.base_url}/token",
+        "userinfo_endpoint": f"{app.state.base_url}/userinfo",
+    }
+
+
+@app.get("/authorize")
+async def authorize(redirect_uri: str, client_id: str = "", response_type: str = "code", scope: str = ""):
+    code = secrets.token_urlsafe(16)
+    codes[code] = app.state.user
+    return RedirectResponse(url=f"{redirect_uri}?{urlencode({'code': code})}")
+
+
+@app.post("/token")
+async def token(request: Request):
+    form = parse_qs((await request.body()).decode())
+    user = codes.pop(form.get("code", [""])[0], None)
+    if user is None or form.get("grant_type") != ["authorization_code"]:
+        raise HTTPException(status_code=400, detail="invalid_grant")
+
+    access_token = secrets.token_urlsafe(24)
+    tokens[access_token] = user
+    return {"access_token": access_token, "token_type": "Bearer", "expires_in": 3600}
+
+
+@app.get("/userinfo")
+async def userinfo(authorization: str = Header("")):
+    user = tokens.get(authorization.removeprefix("Bearer "))
+    if user is None:
+        raise HTTPException(status_code=401, detail="invalid_token")
+    return user
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stub OAuth server")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--email", default="stub.user@example.com")
+    parser.add_argument("--name", default="Stub User")
+    args = parser.parse_args()
+
+    app.state.base_url = f"http://localhost:{args.port}"
+    app.state.user = {"email": args.email, "name": args.name, "picture": None}
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -1,5 +1,24 @@
 import { useNavigate } from "react-router-dom";
 
+// Requests that hit a 401 together share one refresh, since each refresh rotates the refresh cookie.
+// 409 means another tab rotated it a moment ago and its new cookies are already in place.
+let refreshing = null;
+
+const refreshSession = () => {
+  if (!refreshing) {
+    refreshing = fetch(`${import.meta.env.VITE_BACKEND_URL}/refresh`, {
+      method: 'POST',
+      credentials: "include",
+    })
+      .then((response) => response.ok || response.status === 409)
+      .catch(() => false)
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
 const useApiRequest = () => {
   const navigate = useNavigate();
 
@@ -18,11 +37,19 @@ const useApiRequest = () => {
         options.body = JSON.stringify(body);
       }
 
-      const response = await fetch(`${import.meta.env.VITE_BACKEND_URL}${endpoint}`, options);
+      let response = await fetch(`${import.meta.env.VITE_BACKEND_URL}${endpoint}`, options);
 
+      // The access cookie is short-lived; renew it with the refresh cookie once before sending the user to login
       if (response.status === 401) {
-        navigate("/login");
-        return;
+        if (!(await refreshSession())) {
+          navigate("/login");
+          return;
+        }
+        response = await fetch(`${import.meta.env.VITE_BACKEND_URL}${endpoint}`, options);
+        if (response.status === 401) {
+          navigate("/login");
+          return;
+        }
       }
 
       if (!response.ok) {